@@ -0,0 +1,180 @@
+import hashlib
+import json
+import os
+import pickle
+import sqlite3
+import threading
+import time
+import numpy as np
+from config import ARTIFACT_CACHE_DIR, ARTIFACT_CACHE_MAX_BYTES, ARTIFACT_CACHE_VERSION, CACHE_DB_TIMEOUT
+
+def hash_file(path, block_size=1 << 20):
+    """SHA-256 of a file's content, read in blocks"""
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        for block in iter(lambda: f.read(block_size), b""):
+            digest.update(block)
+    return digest.hexdigest()
+
+def _update_digest(digest, value):
+    if isinstance(value, np.ndarray):
+        # Hash array memory directly - pickling a memory-mapped array would copy it
+        digest.update(f"ndarray:{value.dtype.str}:{value.shape}".encode("utf-8"))
+        digest.update(np.ascontiguousarray(value).data)
+    elif isinstance(value, tuple) and any(isinstance(item, np.ndarray) for item in value):
+        digest.update(f"tuple:{len(value)}".encode("utf-8"))
+        for item in value:
+            _update_digest(digest, item)
+    elif isinstance(value, dict) and any(isinstance(item, np.ndarray) for item in value.values()):
+        digest.update(f"dict:{len(value)}".encode("utf-8"))
+        for key in sorted(value):
+            digest.update(repr(key).encode("utf-8"))
+            _update_digest(digest, value[key])
+    else:
+        digest.update(pickle.dumps(value, protocol=pickle.HIGHEST_PROTOCOL))
+
+def hash_value(value):
+    """Content hash of any picklable value"""
+    digest = hashlib.sha256()
+    _update_digest(digest, value)
+    return digest.hexdigest()
+
+def make_stage_key(stage_name, stage_config, upstream_hashes):
+    """Cache key from the stage, its configuration and the hashes of everything it consumes"""
+    payload = json.dumps(
+        {"version": ARTIFACT_CACHE_VERSION, "stage": stage_name, "config": stage_config, "upstream": upstream_hashes},
+        sort_keys=True,
+        default=str,
+    )
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+class ArtifactCache:
+    """Pickled stage outputs on local disk with a SQLite index and size-based LRU eviction
+
+    An index that stays locked by other processes is treated as a cache miss.
+    """
+
+    def __init__(self, root=ARTIFACT_CACHE_DIR, max_bytes=ARTIFACT_CACHE_MAX_BYTES):
+        self.root = root
+        self.max_bytes = max_bytes
+        os.makedirs(root, exist_ok=True)
+        self._lock = threading.Lock()
+        self._db = sqlite3.connect(os.path.join(root, "index.sqlite"), timeout=CACHE_DB_TIMEOUT, check_same_thread=False)
+        # WAL lets batch workers read while another one writes
+        self._db.execute("PRAGMA journal_mode=WAL")
+        self._db.execute(
+            "CREATE TABLE IF NOT EXISTS artifacts ("
+            "key TEXT PRIMARY KEY, stage TEXT NOT NULL, source TEXT, artifact_hash TEXT NOT NULL, "
+            "size INTEGER NOT NULL, last_access REAL NOT NULL)"
+        )
+        self._db.commit()
+
+    def _path(self, key):
+        return os.path.join(self.root, key[:2], f"{key}.pkl")
+
+    def get(self, key):
+        """Return (value, artifact_hash) for a key, or None when it is not cached"""
+        with self._lock:
+            try:
+                row = self._db.execute("SELECT artifact_hash FROM artifacts WHERE key = ?", (key,)).fetchone()
+                if row is None:
+                    return None
+                path = self._path(key)
+                try:
+                    with open(path, "rb") as f:
+                        value = pickle.load(f)
+                except (OSError, pickle.UnpicklingError, EOFError):
+                    # Index and disk disagree - drop the entry and recompute
+                    self._db.execute("DELETE FROM artifacts WHERE key = ?", (key,))
+                    self._db.commit()
+                    return None
+                self._db.execute("UPDATE artifacts SET last_access = ? WHERE key = ?", (time.time(), key))
+                self._db.commit()
+                return value, row[0]
+            except sqlite3.OperationalError as e:
+                self._db.rollback()
+                print(f"Artifact cache read failed, recomputing: {e}")
+                return None
+
+    def put(self, key, stage, value, source=None):
+        """Store a stage output and return its artifact hash"""
+        data = pickle.dumps(value, protocol=pickle.HIGHEST_PROTOCOL)
+        artifact_hash = hashlib.sha256(data).hexdigest()
+        path = self._path(key)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        tmp_path = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+        with open(tmp_path, "wb") as f:
+            f.write(data)
+        os.replace(tmp_path, path)
+
+        with self._lock:
+            try:
+                self._db.execute(
+                    "INSERT OR REPLACE INTO artifacts (key, stage, source, artifact_hash, size, last_access) VALUES (?, ?, ?, ?, ?, ?)",
+                    (key, stage, source, artifact_hash, len(data), time.time()),
+                )
+                self._db.commit()
+                self._evict()
+            except sqlite3.OperationalError as e:
+                # Unindexed files are never read, so drop it and leave this stage uncached
+                self._db.rollback()
+                try:
+                    os.remove(path)
+                except FileNotFoundError:
+                    pass
+                print(f"Artifact cache write failed, skipping: {e}")
+        return artifact_hash
+
+    def _evict(self):
+        total = self._db.execute("SELECT COALESCE(SUM(size), 0) FROM artifacts").fetchone()[0]
+        if total <= self.max_bytes:
+            return
+        for key, size in self._db.execute("SELECT key, size FROM artifacts ORDER BY last_access").fetchall():
+            self._remove(key)
+            total -= size
+            if total <= self.max_bytes:
+                break
+        self._db.commit()
+
+    def _remove(self, key):
+        try:
+            os.remove(self._path(key))
+        except FileNotFoundError:
+            pass
+        self._db.execute("DELETE FROM artifacts WHERE key = ?", (key,))
+
+    def invalidate_stage(self, stage, source=None):
+        """Drop cached outputs of one stage, for every file or only for one source (audio hash)"""
+        with self._lock:
+            if source is None:
+                rows = self._db.execute("SELECT key FROM artifacts WHERE stage = ?", (stage,)).fetchall()
+            else:
+                rows = self._db.execute("SELECT key FROM artifacts WHERE stage = ? AND source = ?", (stage, source)).fetchall()
+            for (key,) in rows:
+                self._remove(key)
+            self._db.commit()
+        return len(rows)
+
+    def clear(self):
+        """Remove every cached artifact"""
+        with self._lock:
+            for (key,) in self._db.execute("SELECT key FROM artifacts").fetchall():
+                self._remove(key)
+            self._db.commit()
+
+    def stats(self):
+        """Entry count and total size per stage"""
+        with self._lock:
+            rows = self._db.execute("SELECT stage, COUNT(*), SUM(size) FROM artifacts GROUP BY stage").fetchall()
+        return {stage: {"entries": count, "bytes": size} for stage, count, size in rows}
+
+_artifact_cache = None
+_artifact_cache_lock = threading.Lock()
+
+def get_artifact_cache():
+    """Process-wide artifact cache at ARTIFACT_CACHE_DIR"""
+    global _artifact_cache
+    with _artifact_cache_lock:
+        if _artifact_cache is None:
+            _artifact_cache = ArtifactCache()
+        return _artifact_cache
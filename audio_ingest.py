@@ -1,7 +1,21 @@
+import os
+import shutil
+import subprocess
+import tempfile
+import weakref
+import audioread
 import librosa
 import numpy as np
 import soundfile as sf
-import tempfile
+import soxr
+import webrtcvad
+from config import (
+    SAMPLE_RATE, MAX_AUDIO_DURATION, STREAMING_AUDIO_DECODE, AUDIO_DECODE_BLOCK_SECONDS, AUDIO_SCRATCH_DIR, FFMPEG_BINARY,
+    VAD_AGGRESSIVENESS, VAD_FRAME_MS, VAD_MIN_SPEECH_SECONDS, VAD_MIN_SILENCE_SECONDS, VAD_PADDING_SECONDS,
+)
+
+PCM_EXTENSIONS = ('.wav', '.flac')
+COMPRESSED_EXTENSIONS = ('.mp3', '.m4a')
 
 def validate_audio(file_path):
     """Validate audio file"""
@@ -10,13 +24,178 @@ def validate_audio(file_path):
         raise ValueError(f"Unsupported file format. Allowed: {allowed_extensions}")
     return True
 
+def _check_duration(seconds, max_duration):
+    if max_duration and seconds > max_duration:
+        raise ValueError(f"Audio is longer than the {max_duration / 60:.0f} minute limit ({seconds / 60:.1f} min)")
+
+def _soundfile_blocks(file_path, block_seconds):
+    """Float32 (frames, channels) blocks read with libsndfile"""
+    with sf.SoundFile(file_path) as f:
+        for block in f.blocks(blocksize=max(int(block_seconds * f.samplerate), 1), dtype="float32", always_2d=True):
+            yield block
+
+def _audioread_blocks(audio_file):
+    """Float32 (frames, channels) blocks from an audioread decoder's 16-bit buffers"""
+    channels = audio_file.channels
+    remainder = np.zeros(0, dtype=np.float32)
+    with audio_file:
+        for buffer in audio_file:
+            samples = np.concatenate([remainder, np.frombuffer(buffer, dtype="<i2").astype(np.float32) / 32768.0])
+            usable = len(samples) - len(samples) % channels
+            remainder = samples[usable:]
+            yield samples[:usable].reshape(-1, channels)
+
+def _ffmpeg_blocks(file_path, sr, block_seconds):
+    """Mono float32 blocks at sr, decoded and resampled by an ffmpeg subprocess writing to a pipe"""
+    command = [
+        FFMPEG_BINARY, "-nostdin", "-v", "error", "-i", file_path,
+        "-f", "f32le", "-acodec", "pcm_f32le", "-ac", "1", "-ar", str(sr), "-",
+    ]
+    # stderr goes to a file, not a pipe: nothing reads it until stdout is exhausted, so a long
+    # run of decode warnings would otherwise fill the pipe and stall both processes
+    errors = tempfile.TemporaryFile()
+    process = subprocess.Popen(command, stdout=subprocess.PIPE, stderr=errors)
+    block_bytes = max(int(block_seconds * sr), 1) * 4
+    try:
+        while True:
+            data = process.stdout.read(block_bytes)
+            if not data:
+                break
+            yield np.frombuffer(data[:len(data) - len(data) % 4], dtype="<f4").reshape(-1, 1)
+        returncode = process.wait()
+        if returncode != 0:
+            errors.seek(0)
+            error = errors.read().decode("utf-8", errors="replace").strip()[-2000:]
+            raise ValueError(f"ffmpeg could not decode {file_path}: {error}")
+    finally:
+        # Stopping early (e.g. over the duration limit) must not leave ffmpeg running
+        if process.poll() is None:
+            process.kill()
+            process.wait()
+        process.stdout.close()
+        errors.close()
+
+def open_audio_blocks(file_path, sr=SAMPLE_RATE, block_seconds=AUDIO_DECODE_BLOCK_SECONDS):
+    """(source sample rate, duration in seconds or None, iterator of float32 blocks) for an audio file
+
+    WAV and FLAC are read directly with libsndfile (no resampling is needed when they are
+    already at sr). MP3 and M4A are piped through ffmpeg, which delivers mono audio at sr;
+    without ffmpeg they fall back to libsndfile, then audioread.
+    """
+    extension = os.path.splitext(file_path)[1].lower()
+    if extension in COMPRESSED_EXTENSIONS and shutil.which(FFMPEG_BINARY):
+        return sr, None, _ffmpeg_blocks(file_path, sr, block_seconds)
+    try:
+        info = sf.info(file_path)
+        return info.samplerate, info.duration, _soundfile_blocks(file_path, block_seconds)
+    except (sf.LibsndfileError, RuntimeError):
+        # Formats libsndfile cannot read (e.g. M4A) go through audioread
+        audio_file = audioread.audio_open(file_path)
+        return audio_file.samplerate, audio_file.duration or None, _audioread_blocks(audio_file)
+
+def decode_to_pcm_file(file_path, sr=SAMPLE_RATE, max_duration=MAX_AUDIO_DURATION,
+                       block_seconds=AUDIO_DECODE_BLOCK_SECONDS, scratch_dir=AUDIO_SCRATCH_DIR):
+    """Decode, downmix and resample an audio file block by block into a raw float32 file
+
+    Returns (path, number of samples, peak absolute amplitude). Raises ValueError as soon as
+    the audio is known to exceed max_duration.
+    """
+    native_sr, duration, blocks = open_audio_blocks(file_path, sr, block_seconds)
+    if duration:
+        _check_duration(duration, max_duration)
+    max_samples = int(max_duration * sr) if max_duration else None
+    resampler = soxr.ResampleStream(native_sr, sr, 1, dtype="float32", quality="HQ") if native_sr != sr else None
+
+    fd, path = tempfile.mkstemp(suffix=".f32", dir=scratch_dir)
+    num_samples = 0
+    peak = 0.0
+    try:
+        with os.fdopen(fd, "wb") as out:
+            def write(samples):
+                nonlocal num_samples, peak
+                num_samples += len(samples)
+                if max_samples is not None and num_samples > max_samples:
+                    _check_duration(num_samples / sr, max_duration)
+                if len(samples):
+                    peak = max(peak, float(np.abs(samples).max()))
+                    out.write(samples.tobytes())
+
+            for block in blocks:
+                mono = block.mean(axis=1, dtype=np.float32) if block.shape[1] > 1 else block[:, 0]
+                mono = np.ascontiguousarray(mono, dtype=np.float32)
+                write(resampler.resample_chunk(mono) if resampler else mono)
+            if resampler:
+                write(resampler.resample_chunk(np.zeros(0, dtype=np.float32), last=True))
+    except BaseException:
+        blocks.close()
+        os.remove(path)
+        raise
+    return path, num_samples, peak
+
+def _remove_quietly(path):
+    try:
+        os.remove(path)
+    except OSError:
+        pass
+
+def map_pcm_file(path, num_samples):
+    """Copy-on-write memory map of a raw float32 file that is deleted once the mapping is released"""
+    if num_samples == 0:
+        _remove_quietly(path)
+        return np.zeros(0, dtype=np.float32)
+    audio = np.memmap(path, dtype=np.float32, mode="c", shape=(num_samples,))
+    _unlink_when_released(audio, path)
+    return audio
+
+def _unlink_when_released(audio, path):
+    try:
+        # POSIX keeps the mapping valid after unlinking; the space is freed when it is released
+        os.remove(path)
+    except OSError:
+        weakref.finalize(audio._mmap, _remove_quietly, path)
+
+def scratch_array(num_samples, scratch_dir=AUDIO_SCRATCH_DIR):
+    """Writable float32 array backed by a scratch file instead of process memory"""
+    if num_samples == 0:
+        return np.zeros(0, dtype=np.float32)
+    fd, path = tempfile.mkstemp(suffix=".f32", dir=scratch_dir)
+    os.close(fd)
+    audio = np.memmap(path, dtype=np.float32, mode="w+", shape=(num_samples,))
+    _unlink_when_released(audio, path)
+    return audio
+
+def scale_pcm_file(path, num_samples, gain, block_samples):
+    """Multiply a raw float32 file by gain in place, one block at a time"""
+    audio = np.memmap(path, dtype=np.float32, mode="r+", shape=(num_samples,))
+    for start in range(0, num_samples, block_samples):
+        audio[start:start + block_samples] *= gain
+    audio.flush()
+    del audio
+
+def stream_audio_to_memmap(file_path, sr=SAMPLE_RATE, max_duration=MAX_AUDIO_DURATION):
+    """Peak-normalized mono audio at sr as a memory-mapped float32 array"""
+    path, num_samples, peak = decode_to_pcm_file(file_path, sr, max_duration)
+    # Same rule as librosa.util.normalize: leave near-silent audio untouched
+    if num_samples and peak > np.finfo(np.float32).tiny and peak != 1.0:
+        scale_pcm_file(path, num_samples, np.float32(1.0 / peak), int(AUDIO_DECODE_BLOCK_SECONDS * sr))
+    return map_pcm_file(path, num_samples)
+
 def load_and_preprocess_audio(file_path):
-    """Load and preprocess audio using librosa only"""
+    """Load and preprocess audio (mono, 16 kHz, peak-normalized)
+
+    With STREAMING_AUDIO_DECODE the result is a memory-mapped array, so slices handed to
+    later stages are views onto the page cache rather than copies.
+    """
     print("Loading and preprocessing audio...")
     
     validate_audio(file_path)
-    audio, sr = librosa.load(file_path, sr=16000, mono=True)
-    audio = librosa.util.normalize(audio)
+    sr = SAMPLE_RATE
+    if STREAMING_AUDIO_DECODE:
+        audio = stream_audio_to_memmap(file_path, sr)
+    else:
+        audio, sr = librosa.load(file_path, sr=sr, mono=True)
+        _check_duration(len(audio) / sr, MAX_AUDIO_DURATION)
+        audio = librosa.util.normalize(audio)
     print(f"Audio loaded: {len(audio)/sr:.2f} seconds, Sample rate: {sr}")
     
     return audio, sr
@@ -25,4 +204,164 @@ def save_audio_to_temp(audio, sr):
     """Save audio to temporary file for Whisper"""
     temp_file = tempfile.NamedTemporaryFile(delete=False, suffix='.wav')
     sf.write(temp_file.name, audio, sr)
-    return temp_file.name
\ No newline at end of file
+    return temp_file.name
+
+def frame_rms(audio, sr, frame_seconds=0.03):
+    """Root-mean-square energy of non-overlapping frames"""
+    frame_length = max(int(frame_seconds * sr), 1)
+    n_frames = len(audio) // frame_length
+    if n_frames == 0:
+        return np.zeros(0, dtype=np.float32), frame_length
+    frames = np.asarray(audio[:n_frames * frame_length], dtype=np.float32).reshape(n_frames, frame_length)
+    rms = np.sqrt(np.mean(frames ** 2, axis=1))
+    return rms, frame_length
+
+def find_silence_split_points(audio, sr, max_chunk_seconds, search_seconds=30):
+    """Split audio into chunks of at most max_chunk_seconds, cutting at the quietest frame near each boundary"""
+    total = len(audio)
+    max_chunk = int(max_chunk_seconds * sr)
+    if total <= max_chunk:
+        return [(0, total)]
+
+    rms, frame_length = frame_rms(audio, sr)
+    search = max(int(search_seconds * sr), frame_length)
+
+    chunks = []
+    start = 0
+    while total - start > max_chunk:
+        limit = start + max_chunk
+        lo_frame = max((limit - search) // frame_length, start // frame_length + 1)
+        hi_frame = max(limit // frame_length, lo_frame + 1)
+        window = rms[lo_frame:hi_frame]
+        if len(window):
+            cut = (lo_frame + int(np.argmin(window))) * frame_length + frame_length // 2
+        else:
+            cut = limit
+        cut = min(max(cut, start + 1), limit)
+        chunks.append((start, cut))
+        start = cut
+    chunks.append((start, total))
+    return chunks
+
+
+def detect_speech_regions(audio, sr, aggressiveness=VAD_AGGRESSIVENESS, frame_ms=VAD_FRAME_MS,
+                          min_speech_seconds=VAD_MIN_SPEECH_SECONDS, min_silence_seconds=VAD_MIN_SILENCE_SECONDS,
+                          padding_seconds=VAD_PADDING_SECONDS):
+    """(start, end) sample ranges containing speech, found with webrtcvad
+
+    Speech bursts shorter than min_speech_seconds are dropped, every region is padded by
+    padding_seconds and regions separated by less than min_silence_seconds are merged, so
+    only long pauses are cut.
+    """
+    frame_length = int(sr * frame_ms / 1000)
+    n_frames = len(audio) // frame_length
+    if n_frames == 0:
+        return [(0, len(audio))] if len(audio) else []
+
+    vad = webrtcvad.Vad(aggressiveness)
+    is_speech = np.zeros(n_frames, dtype=bool)
+    # Convert to 16-bit PCM a block at a time so a memory-mapped input is never copied whole
+    block_frames = max(int(AUDIO_DECODE_BLOCK_SECONDS * sr) // frame_length, 1)
+    frame_bytes = frame_length * 2
+    for first in range(0, n_frames, block_frames):
+        last = min(first + block_frames, n_frames)
+        block = audio[first * frame_length:last * frame_length]
+        pcm = (np.clip(block, -1.0, 1.0) * 32767).astype("<i2").tobytes()
+        for i in range(last - first):
+            is_speech[first + i] = vad.is_speech(pcm[i * frame_bytes:(i + 1) * frame_bytes], sr)
+
+    # Runs of speech frames as [start, end) frame indices
+    edges = np.diff(np.concatenate([[0], is_speech.astype(np.int8), [0]]))
+    runs = zip(np.flatnonzero(edges == 1), np.flatnonzero(edges == -1))
+    min_speech = max(int(round(min_speech_seconds * 1000 / frame_ms)), 1)
+    padding = int(padding_seconds * sr)
+    min_silence = int(min_silence_seconds * sr)
+
+    regions = []
+    for start_frame, end_frame in runs:
+        if end_frame - start_frame < min_speech:
+            continue
+        start = max(start_frame * frame_length - padding, 0)
+        end = min(end_frame * frame_length + padding, len(audio))
+        if regions and start - regions[-1][1] < min_silence:
+            regions[-1] = (regions[-1][0], end)
+        else:
+            regions.append((start, end))
+    return regions
+
+def compact_speech(audio, regions):
+    """Concatenate speech regions into one buffer
+
+    Returns (speech audio, offset map) where each offset map row is
+    (compact start, original start, length) in samples.
+    """
+    lengths = [end - start for start, end in regions]
+    compact_starts = np.concatenate([[0], np.cumsum(lengths)[:-1]]) if regions else np.zeros(0)
+    offset_map = np.array([(compact_start, start, length) for compact_start, (start, _), length
+                           in zip(compact_starts, regions, lengths)], dtype=np.int64).reshape(-1, 3)
+
+    if len(regions) == 1 and regions[0] == (0, len(audio)):
+        return audio, offset_map
+
+    speech = scratch_array(int(sum(lengths)))
+    for compact_start, start, length in offset_map:
+        speech[compact_start:compact_start + length] = audio[start:start + length]
+    return speech, offset_map
+
+def _map_times(times, offset_map, sr, from_column, to_column, side):
+    samples = np.asarray(times, dtype=np.float64) * sr
+    # side="left" assigns a time on a region boundary to the region before it (for end times)
+    index = np.clip(np.searchsorted(offset_map[:, from_column], samples, side=side) - 1, 0, len(offset_map) - 1)
+    within = np.clip(samples - offset_map[index, from_column], 0, offset_map[index, 2])
+    return (offset_map[index, to_column] + within) / sr
+
+def compact_to_original(times, offset_map, sr, side="right"):
+    """Map times in seconds on the compacted timeline back to the original recording"""
+    return _map_times(times, offset_map, sr, 0, 1, side)
+
+def original_to_compact(times, offset_map, sr, side="right"):
+    """Map times in seconds on the original recording onto the compacted timeline"""
+    return _map_times(times, offset_map, sr, 1, 0, side)
+
+def remap_segments(segments, offset_map, sr, to_original=True):
+    """Copies of segments (and their word timings, if any) with start/end moved between timelines"""
+    if not segments or len(offset_map) == 0:
+        return [dict(seg) for seg in segments]
+    mapper = compact_to_original if to_original else original_to_compact
+    starts = mapper([seg["start"] for seg in segments], offset_map, sr, side="right")
+    ends = mapper([seg["end"] for seg in segments], offset_map, sr, side="left")
+
+    mapped = []
+    for seg, start, end in zip(segments, starts, ends):
+        seg = {**seg, "start": float(start), "end": float(end)}
+        if seg.get("words"):
+            word_starts = mapper([word["start"] for word in seg["words"]], offset_map, sr, side="right")
+            word_ends = mapper([word["end"] for word in seg["words"]], offset_map, sr, side="left")
+            seg["words"] = [{**word, "start": float(ws), "end": float(we)}
+                            for word, ws, we in zip(seg["words"], word_starts, word_ends)]
+        mapped.append(seg)
+    return mapped
+
+def remove_silence(audio, sr, enabled=True):
+    """VAD pre-pass: speech-only audio, its offset map and how much audio was skipped
+
+    Returns a dict with "audio", "sample_rate", "offset_map", "regions", "speech_seconds"
+    and "skipped_fraction". If no speech is detected the full audio is kept.
+    """
+    regions = detect_speech_regions(audio, sr) if enabled and len(audio) else []
+    if not regions:
+        regions = [(0, len(audio))]
+    speech, offset_map = compact_speech(audio, regions)
+
+    total = len(audio)
+    skipped_fraction = 1.0 - len(speech) / total if total else 0.0
+    print(f"Voice activity: kept {len(speech)/sr:.1f}s of {total/sr:.1f}s in {len(regions)} regions "
+          f"({skipped_fraction:.1%} skipped)")
+    return {
+        "audio": speech,
+        "sample_rate": sr,
+        "offset_map": offset_map,
+        "regions": len(regions),
+        "speech_seconds": len(speech) / sr,
+        "skipped_fraction": skipped_fraction,
+    }
\ No newline at end of file
@@ -0,0 +1,174 @@
+"""Analyze a directory (or manifest) of interview recordings with a pool of worker processes
+
+Usage:
+    python batch_cli.py interviews/ --output-dir reports/ --workers 4
+    python batch_cli.py files.txt --output-dir reports/
+
+Progress is appended to a JSONL manifest (default: <output-dir>/batch_manifest.jsonl); running
+the same command again skips files already marked done, so a crashed batch resumes.
+Reports mirror each file's path relative to the source root, so files with the same name in
+different folders do not overwrite each other.
+"""
+import argparse
+import csv
+import json
+import multiprocessing
+import os
+import time
+import traceback
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from config import BATCH_WORKERS, PIPELINE_MODE
+
+AUDIO_EXTENSIONS = ('.mp3', '.wav', '.m4a', '.flac')
+
+def collect_audio_files(source):
+    """Absolute audio paths from a directory (recursive) or a manifest file (.txt, .csv or .jsonl)"""
+    if os.path.isdir(source):
+        files = []
+        for root, _, names in os.walk(source):
+            files.extend(os.path.abspath(os.path.join(root, name)) for name in names if name.lower().endswith(AUDIO_EXTENSIONS))
+        return sorted(files)
+
+    base_dir = os.path.dirname(os.path.abspath(source))
+    with open(source, encoding="utf-8") as f:
+        if source.lower().endswith(".jsonl"):
+            paths = [json.loads(line)["path"] for line in f if line.strip()]
+        elif source.lower().endswith(".csv"):
+            paths = [row["path"] for row in csv.DictReader(f)]
+        else:
+            paths = [line.strip() for line in f if line.strip() and not line.startswith("#")]
+    return [os.path.abspath(os.path.join(base_dir, path)) for path in paths]
+
+def read_manifest(manifest_path):
+    """Latest status record per file (keyed by absolute path) from a progress manifest"""
+    records = {}
+    if not os.path.exists(manifest_path):
+        return records
+    with open(manifest_path, encoding="utf-8") as f:
+        for line in f:
+            try:
+                record = json.loads(line)
+            except json.JSONDecodeError:
+                # A crash can leave a truncated last line
+                continue
+            records[os.path.abspath(record["file"])] = record
+    return records
+
+def append_manifest(manifest_path, record):
+    with open(manifest_path, "a", encoding="utf-8") as f:
+        f.write(json.dumps(record) + "\n")
+        f.flush()
+        os.fsync(f.fileno())
+
+def source_root(source, files):
+    """Directory that report paths are made relative to"""
+    if os.path.isdir(source):
+        return os.path.abspath(source)
+    return os.path.commonpath([os.path.dirname(path) for path in files]) if files else os.getcwd()
+
+def report_base_path(audio_path, output_dir, root):
+    """Report path without extension, mirroring audio_path's place under root"""
+    relative = os.path.relpath(os.path.abspath(audio_path), root)
+    return os.path.join(output_dir, os.path.splitext(relative)[0])
+
+def _init_worker(torch_threads, transcribe_workers):
+    """Load every model once per worker process"""
+    import torch
+    from model_registry import warm_models
+    from transcribe_whisper import set_transcribe_workers
+    torch.set_num_threads(torch_threads)
+    set_transcribe_workers(transcribe_workers)
+    warm_models()
+
+def process_file(audio_path, base_path, mode=PIPELINE_MODE):
+    """Run the pipeline on one file and export its reports; never raises"""
+    from pipeline import run_full_pipeline
+    from report_exporter import export_results
+
+    start = time.perf_counter()
+    record = {"file": audio_path, "started_at": time.time()}
+    try:
+        results = run_full_pipeline(audio_path, mode=mode)
+        os.makedirs(os.path.dirname(base_path), exist_ok=True)
+        exported = export_results(results, base_path)
+        record.update({
+            "status": "done" if exported else "failed",
+            "audio_seconds": results['audio_metadata']['duration'],
+            "report": base_path,
+            "candidate_speaker": results['candidate_speaker'],
+        })
+        if not exported:
+            record["error"] = "Report export failed"
+    except Exception as e:
+        record.update({"status": "failed", "error": f"{type(e).__name__}: {e}", "traceback": traceback.format_exc()})
+    record["wall_seconds"] = time.perf_counter() - start
+    return record
+
+def summarize_throughput(records, wall_seconds):
+    """Files per hour and audio minutes processed per wall-clock minute"""
+    done = [record for record in records if record.get("status") == "done"]
+    audio_minutes = sum(record.get("audio_seconds", 0) for record in done) / 60
+    wall_minutes = max(wall_seconds / 60, 1e-9)
+    return {
+        "files_done": len(done),
+        "files_failed": sum(1 for record in records if record.get("status") == "failed"),
+        "wall_seconds": wall_seconds,
+        "audio_minutes": audio_minutes,
+        "files_per_hour": len(done) / (wall_minutes / 60),
+        "audio_minutes_per_minute": audio_minutes / wall_minutes,
+    }
+
+def run_batch(source, output_dir, workers=BATCH_WORKERS, manifest_path=None, retry_failed=False, mode=PIPELINE_MODE,
+              transcribe_workers=1):
+    """Process every pending file in source and return the throughput summary
+
+    Each worker process already runs its own pipeline, so chunked transcription inside it
+    uses transcribe_workers processes (1 by default) rather than TRANSCRIBE_WORKERS.
+    """
+    os.makedirs(output_dir, exist_ok=True)
+    manifest_path = manifest_path or os.path.join(output_dir, "batch_manifest.jsonl")
+
+    files = collect_audio_files(source)
+    root = source_root(source, files)
+    previous = read_manifest(manifest_path)
+    skip_statuses = {"done"} if retry_failed else {"done", "failed"}
+    pending = [path for path in files if previous.get(path, {}).get("status") not in skip_statuses]
+    print(f"Batch: {len(files)} files, {len(files) - len(pending)} already processed, {len(pending)} to go")
+    if not pending:
+        return summarize_throughput([], 0.0)
+
+    torch_threads = max(1, (os.cpu_count() or 1) // workers)
+
+    records = []
+    start = time.perf_counter()
+    context = multiprocessing.get_context("spawn")
+    with ProcessPoolExecutor(max_workers=workers, mp_context=context,
+                             initializer=_init_worker, initargs=(torch_threads, transcribe_workers)) as pool:
+        futures = {pool.submit(process_file, path, report_base_path(path, output_dir, root), mode): path for path in pending}
+        for index, future in enumerate(as_completed(futures), 1):
+            record = future.result()
+            append_manifest(manifest_path, record)
+            records.append(record)
+            print(f"[{index}/{len(pending)}] {record['status']}: {record['file']} ({record['wall_seconds']:.1f}s)")
+
+    summary = summarize_throughput(records, time.perf_counter() - start)
+    print(
+        f"\nProcessed {summary['files_done']} files ({summary['files_failed']} failed) in {summary['wall_seconds'] / 60:.1f} min: "
+        f"{summary['files_per_hour']:.1f} files/hour, {summary['audio_minutes_per_minute']:.2f} audio-min/min"
+    )
+    return summary
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("source", help="Directory of audio files or a manifest (.txt, .csv or .jsonl with a 'path' field)")
+    parser.add_argument("--output-dir", default="reports", help="Where reports and the progress manifest are written")
+    parser.add_argument("--workers", type=int, default=BATCH_WORKERS, help="Worker processes (models load once per worker)")
+    parser.add_argument("--manifest", help="Progress manifest path (default: <output-dir>/batch_manifest.jsonl)")
+    parser.add_argument("--retry-failed", action="store_true", help="Also reprocess files that failed previously")
+    parser.add_argument("--mode", choices=["concurrent", "sequential", "streaming"], default=PIPELINE_MODE, help="Stage scheduling inside each file")
+    args = parser.parse_args()
+
+    run_batch(args.source, args.output_dir, args.workers, args.manifest, args.retry_failed, args.mode)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,75 @@
+"""Offline check that speaker changes are found inside segments, wherever the other voice falls
+
+Usage:
+    python -m benchmarks.change_points [--seed 0]
+
+Window embeddings are simulated: each window mixes two near-orthogonal speaker vectors in
+proportion to how much of it each voice covers, plus noise, at the encoder's window length
+and EMBEDDING_WINDOW_RATE. Each case puts an interjection by speaker B inside a 30 s segment
+by speaker A. Exits with status 1 if a change is missed, invented or misplaced.
+"""
+import argparse
+import sys
+import time
+import numpy as np
+from diarize import detect_speaker_changes
+from config import EMBEDDING_WINDOW_RATE
+
+WINDOW_SECONDS = 1.6  # resemblyzer partial utterance length
+TOLERANCE_SECONDS = 0.75
+
+# (name, segment end, interjections as (start, end)) - segments start at 0
+CASES = [
+    ("interjection at start", 30.0, [(0.0, 4.0)]),
+    ("interjection in the middle", 30.0, [(20.0, 24.0)]),
+    ("short interjection in the middle", 30.0, [(12.0, 14.0)]),
+    ("interjection at end", 30.0, [(26.0, 30.0)]),
+    ("two interjections", 30.0, [(8.0, 11.0), (19.0, 22.0)]),
+    ("single speaker", 30.0, []),
+]
+
+def simulate_windows(duration, interjections, rng, dim=256, noise=0.05):
+    """Window embeddings and spans for one segment with speaker B talking during interjections"""
+    voice_a, voice_b = rng.standard_normal((2, dim))
+    voice_b -= voice_a * (voice_a @ voice_b) / (voice_a @ voice_a)
+    voice_a /= np.linalg.norm(voice_a)
+    voice_b /= np.linalg.norm(voice_b)
+
+    starts = np.arange(0.0, duration - WINDOW_SECONDS + 1e-9, 1.0 / EMBEDDING_WINDOW_RATE)
+    spans = np.stack([starts, starts + WINDOW_SECONDS], axis=1)
+    share_b = np.zeros(len(starts))
+    for start, end in interjections:
+        share_b += np.clip(np.minimum(spans[:, 1], end) - np.maximum(spans[:, 0], start), 0, None) / WINDOW_SECONDS
+    embeddings = (1 - share_b)[:, None] * voice_a + share_b[:, None] * voice_b
+    embeddings += noise * rng.standard_normal(embeddings.shape) / np.sqrt(dim)
+    return embeddings / np.linalg.norm(embeddings, axis=1, keepdims=True), spans
+
+def expected_changes(duration, interjections):
+    return sorted(t for start, end in interjections for t in (start, end) if 0 < t < duration)
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+    rng = np.random.default_rng(args.seed)
+
+    failures = 0
+    for name, duration, interjections in CASES:
+        embeddings, spans = simulate_windows(duration, interjections, rng)
+        found = detect_speaker_changes(embeddings, spans, 0.0, duration)
+        expected = expected_changes(duration, interjections)
+        ok = len(found) == len(expected) and all(abs(f - e) <= TOLERANCE_SECONDS for f, e in zip(found, expected))
+        failures += not ok
+        print(f"{'ok  ' if ok else 'FAIL'} {name:34} expected {expected} found {[round(t, 2) for t in found]}")
+
+    # An hour of 30 s segments with one interjection each
+    embeddings, spans = simulate_windows(3600.0, [(t + 12.0, t + 15.0) for t in range(0, 3600, 30)], rng)
+    start = time.perf_counter()
+    for t in range(0, 3600, 30):
+        detect_speaker_changes(embeddings, spans, float(t), float(t + 30))
+    print(f"one hour in 30 s segments: {time.perf_counter() - start:.3f}s")
+
+    sys.exit(1 if failures else 0)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,98 @@
+"""Decode time and memory per audio format: format-aware streaming decode vs librosa.load
+
+Usage:
+    python -m benchmarks.decode_formats [audio files...] [--duration 600] [--repeat 3]
+
+Without files, a synthetic interview is written as 16 kHz WAV, 44.1 kHz stereo WAV, FLAC, MP3
+and (when ffmpeg is available) M4A. Each file is decoded by load_and_preprocess_audio and by
+the old librosa.load + normalize path; peak MB is the RSS growth during the call.
+"""
+import argparse
+import os
+import shutil
+import subprocess
+import tempfile
+import librosa
+import numpy as np
+import soundfile as sf
+from audio_ingest import load_and_preprocess_audio
+from benchmarks.synthetic import generate_interview
+from instrumentation import measure_call
+from config import FFMPEG_BINARY, SAMPLE_RATE
+
+def librosa_decode(file_path):
+    """The original ingest path"""
+    audio, sr = librosa.load(file_path, sr=SAMPLE_RATE, mono=True)
+    return librosa.util.normalize(audio), sr
+
+def write_format_samples(output_dir, duration):
+    """Write one synthetic interview in every supported format"""
+    audio, _ = generate_interview(duration)
+    audio_44k = librosa.resample(audio, orig_sr=SAMPLE_RATE, target_sr=44100)
+    stereo = np.stack([audio_44k, 0.8 * audio_44k], axis=1)
+
+    paths = {
+        "wav_16k_mono": os.path.join(output_dir, "interview_16k.wav"),
+        "wav_44k_stereo": os.path.join(output_dir, "interview_44k.wav"),
+        "flac_44k_stereo": os.path.join(output_dir, "interview_44k.flac"),
+        "mp3_44k_stereo": os.path.join(output_dir, "interview_44k.mp3"),
+    }
+    sf.write(paths["wav_16k_mono"], audio, SAMPLE_RATE)
+    sf.write(paths["wav_44k_stereo"], stereo, 44100)
+    sf.write(paths["flac_44k_stereo"], stereo, 44100)
+    sf.write(paths["mp3_44k_stereo"], stereo, 44100)
+    if shutil.which(FFMPEG_BINARY):
+        paths["m4a_44k_stereo"] = os.path.join(output_dir, "interview_44k.m4a")
+        subprocess.run([FFMPEG_BINARY, "-nostdin", "-v", "error", "-y", "-i", paths["wav_44k_stereo"],
+                        paths["m4a_44k_stereo"]], check=True)
+    return paths
+
+def benchmark_decoder(decoder, file_path, repeat):
+    """Best wall time, its CPU time and RSS growth, plus the decoded audio"""
+    best = None
+    for _ in range(repeat):
+        (audio, sr), metrics = measure_call("decode", decoder, {"file_path": file_path})
+        metrics["rss_growth_mb"] = metrics["peak_rss_mb"] - metrics["rss_start_mb"]
+        if best is None or metrics["wall_seconds"] < best["wall_seconds"]:
+            best = metrics
+        result = audio
+    return best, result
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("audio", nargs="*")
+    parser.add_argument("--duration", type=float, default=600.0, help="Length of the synthetic interview in seconds")
+    parser.add_argument("--repeat", type=int, default=3)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory(prefix="decode_benchmark_") as output_dir:
+        files = {os.path.basename(path): path for path in args.audio} or write_format_samples(output_dir, args.duration)
+
+        rows = []
+        for name, path in files.items():
+            row = {"name": name}
+            try:
+                row["old"], old_audio = benchmark_decoder(librosa_decode, path, args.repeat)
+            except Exception as e:
+                print(f"librosa could not decode {name}: {e}")
+                row["old"], old_audio = None, None
+            row["new"], new_audio = benchmark_decoder(load_and_preprocess_audio, path, args.repeat)
+            if old_audio is not None:
+                n = min(len(old_audio), len(new_audio))
+                row["max_diff"] = float(np.max(np.abs(np.asarray(old_audio[:n]) - np.asarray(new_audio[:n])))) if n else 0.0
+            rows.append(row)
+            del old_audio, new_audio
+
+    print(f"\n{'format':18} {'librosa s':>10} {'new s':>8} {'speedup':>8} {'librosa MB':>11} {'new MB':>8} {'max diff':>9}")
+    for row in rows:
+        new = row["new"]
+        old = row["old"]
+        if old is None:
+            print(f"{row['name'][:18]:18} {'failed':>10} {new['wall_seconds']:8.2f} {'':>8} {'':>11} {new['rss_growth_mb']:8.0f}")
+            continue
+        print(f"{row['name'][:18]:18} {old['wall_seconds']:10.2f} {new['wall_seconds']:8.2f} "
+              f"{old['wall_seconds'] / new['wall_seconds']:7.2f}x {old['rss_growth_mb']:11.0f} "
+              f"{new['rss_growth_mb']:8.0f} {row['max_diff']:9.4f}")
+
+if __name__ == "__main__":
+    main()
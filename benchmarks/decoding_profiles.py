@@ -0,0 +1,94 @@
+"""Speed, temperature-fallback retries and word error rate of each Whisper decoding profile
+
+Usage:
+    python -m benchmarks.decoding_profiles interview1.wav interview2.mp3
+        [--profiles reference balanced fast] [--references refs.json]
+
+The configured transcription backend and model size are used. The language is detected once
+per file and pinned for every profile, as the pipeline does. References are read as in
+benchmarks.transcription_backends; files without one are scored against the first profile.
+Each profile is timed without word timestamps, then again with them (skip with
+--no-word-timestamps) to show the cost of the word alignment that change-point splits use.
+"""
+import argparse
+import os
+import time
+from audio_ingest import load_and_preprocess_audio
+from model_registry import warm_models
+from transcribe_whisper import detect_language, transcribe_audio_from_array, decoding_stats
+from benchmarks.transcription_backends import normalize_words, word_errors, load_references
+from config import DECODING_PROFILES, TRANSCRIPTION_BACKEND, WHISPER_MODEL_SIZE
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("audio", nargs="+")
+    parser.add_argument("--profiles", nargs="+", default=list(DECODING_PROFILES), choices=list(DECODING_PROFILES))
+    parser.add_argument("--references", help="JSON file mapping audio file names to reference transcripts")
+    parser.add_argument("--no-word-timestamps", action="store_true", help="skip the timing with word timestamps")
+    args = parser.parse_args()
+
+    warm_models()
+    audio = {os.path.basename(path): load_and_preprocess_audio(path) for path in args.audio}
+    references = load_references(args.audio, args.references)
+    total_audio = sum(len(samples) / sr for samples, sr in audio.values())
+
+    languages = {}
+    detect_seconds = 0.0
+    for name, (samples, sr) in audio.items():
+        start = time.perf_counter()
+        languages[name] = detect_language(samples, sr)
+        detect_seconds += time.perf_counter() - start
+
+    rows = []
+    transcripts = {}
+    for profile in args.profiles:
+        row = {"profile": profile, "seconds": 0.0, "words_seconds": None, "segments": 0, "fallback_segments": 0}
+        transcripts[profile] = {}
+        for name, (samples, sr) in audio.items():
+            start = time.perf_counter()
+            segments, text = transcribe_audio_from_array(samples, sr, language=languages[name], profile=profile,
+                                                         word_timestamps=False)
+            stats = decoding_stats(segments, time.perf_counter() - start, len(samples) / sr)
+            row["seconds"] += stats["decode_seconds"]
+            row["segments"] += stats["segments"]
+            row["fallback_segments"] += stats["fallback_segments"]
+            transcripts[profile][name] = text
+
+        if not args.no_word_timestamps:
+            row["words_seconds"] = 0.0
+            for name, (samples, sr) in audio.items():
+                start = time.perf_counter()
+                transcribe_audio_from_array(samples, sr, language=languages[name], profile=profile, word_timestamps=True)
+                row["words_seconds"] += time.perf_counter() - start
+        rows.append(row)
+
+    baseline = args.profiles[0]
+    for row in rows:
+        errors = words = 0
+        scored_against_baseline = False
+        for name in audio:
+            if name in references:
+                reference = references[name]
+            else:
+                reference = transcripts[baseline][name]
+                scored_against_baseline = True
+            reference_words = normalize_words(reference)
+            errors += word_errors(reference_words, normalize_words(transcripts[row["profile"]][name]))
+            words += len(reference_words)
+        row["wer"] = errors / words if words else 0.0
+        row["wer_note"] = f"vs {baseline}" if scored_against_baseline else ""
+
+    print(f"\n{total_audio:.1f}s of audio in {len(audio)} files, {TRANSCRIPTION_BACKEND} '{WHISPER_MODEL_SIZE}'")
+    print(f"Languages: {', '.join(f'{name}={language}' for name, language in languages.items())} "
+          f"(detected once per file in {detect_seconds:.1f}s)")
+    print(f"{'profile':12} {'transcribe s':>13} {'x realtime':>11} {'segments':>9} {'fallbacks':>10} {'WER':>7} "
+          f"{'+words s':>9} {'words cost':>11}")
+    for row in rows:
+        words = ""
+        if row["words_seconds"] is not None:
+            words = f"{row['words_seconds']:9.1f} {row['words_seconds'] / row['seconds'] - 1:+10.0%}"
+        print(f"{row['profile']:12} {row['seconds']:13.1f} {total_audio / row['seconds']:10.1f}x {row['segments']:9d} "
+              f"{row['fallback_segments']:10d} {row['wer']:7.1%} {words} {row['wer_note']}")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,78 @@
+"""Compare per-segment and whole-waveform speaker embeddings for diarization
+
+Usage:
+    python -m benchmarks.diarization_embeddings interview1.wav interview2.mp3 [--segments results.json]
+
+Without --segments the audio is cut into fixed-length pseudo segments so Whisper is not needed.
+"""
+import argparse
+import json
+import time
+from sklearn.metrics import adjusted_rand_score, normalized_mutual_info_score
+from audio_ingest import load_and_preprocess_audio
+from diarize import compute_segment_embeddings, cluster_speaker_embeddings
+from model_registry import warm_models
+
+def fixed_length_segments(duration, segment_seconds):
+    """Uniform pseudo segments covering the whole recording"""
+    segments = []
+    start = 0.0
+    while start < duration:
+        end = min(start + segment_seconds, duration)
+        if end - start >= 0.5:
+            segments.append({"start": start, "end": end, "text": ""})
+        start = end
+    return segments
+
+def load_segments(path):
+    """Read segments from an exported JSON report or a plain list of segments"""
+    with open(path, encoding="utf-8") as f:
+        data = json.load(f)
+    if isinstance(data, dict):
+        data = data.get("diarized_segments", [])
+    return [{"start": seg["start"], "end": seg["end"], "text": seg.get("text", "")} for seg in data]
+
+def benchmark_file(audio_path, segments_path=None, segment_seconds=4.0, max_speakers=4):
+    """Time both embedding paths on one file and measure how well their clusterings agree"""
+    audio, sr = load_and_preprocess_audio(audio_path)
+    duration = len(audio) / sr
+    segments = load_segments(segments_path) if segments_path else fixed_length_segments(duration, segment_seconds)
+
+    row = {"file": audio_path, "duration": duration, "segments": len(segments)}
+    labels = {}
+    for mode in ["segment", "windowed"]:
+        start = time.perf_counter()
+        embeddings = compute_segment_embeddings(audio, sr, segments, mode)
+        row[f"{mode}_embed_seconds"] = time.perf_counter() - start
+        labels[mode] = cluster_speaker_embeddings(embeddings, max_speakers)
+        row[f"{mode}_speakers"] = int(labels[mode].max()) + 1
+
+    row["speedup"] = row["segment_embed_seconds"] / max(row["windowed_embed_seconds"], 1e-9)
+    row["adjusted_rand"] = adjusted_rand_score(labels["segment"], labels["windowed"])
+    row["nmi"] = normalized_mutual_info_score(labels["segment"], labels["windowed"])
+    return row
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("audio", nargs="+", help="Audio files to benchmark")
+    parser.add_argument("--segments", help="JSON report or segment list to use instead of fixed-length segments (single file only)")
+    parser.add_argument("--segment-seconds", type=float, default=4.0)
+    parser.add_argument("--max-speakers", type=int, default=4)
+    parser.add_argument("--output", help="Write the rows as JSON to this path")
+    args = parser.parse_args()
+
+    warm_models(["voice_encoder"])
+    rows = [benchmark_file(path, args.segments, args.segment_seconds, args.max_speakers) for path in args.audio]
+
+    print(f"\n{'file':40} {'min':>6} {'segs':>6} {'segment s':>10} {'windowed s':>11} {'speedup':>8} {'ARI':>6} {'NMI':>6}")
+    for row in rows:
+        print(f"{row['file'][-40:]:40} {row['duration'] / 60:6.1f} {row['segments']:6d} "
+              f"{row['segment_embed_seconds']:10.2f} {row['windowed_embed_seconds']:11.2f} "
+              f"{row['speedup']:7.1f}x {row['adjusted_rand']:6.3f} {row['nmi']:6.3f}")
+
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            json.dump(rows, f, indent=2)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,97 @@
+"""NER throughput: full spaCy pipeline on one document vs trimmed nlp.pipe over segments
+
+Usage:
+    python -m benchmarks.ner_throughput [--minutes 60] [--model en_core_web_lg] [--transcript results.json]
+
+Without --transcript a synthetic transcript is generated at roughly 150 spoken words per minute.
+"""
+import argparse
+import json
+import random
+import time
+import spacy
+from config import SPACY_MODEL, NER_BATCH_SIZE
+
+SAMPLE_SENTENCES = [
+    "I worked at Google for three years as a project manager in London.",
+    "Before that I studied computer science at the University of Milan.",
+    "We used Microsoft Excel and Google Sheets to track the sales pipeline every week.",
+    "My team at Amazon shipped a new customer service portal in 2021.",
+    "I speak English, Italian and a little Spanish.",
+    "The biggest challenge was coordinating with the marketing department in New York.",
+    "Honestly I think communication is the most important part of management.",
+    "Can you tell me about a time you handled a difficult client?",
+    "Sure, at Deloitte we had a client in Berlin who changed the requirements twice.",
+    "I led the website development project and we launched it in six months.",
+]
+
+def synthetic_segments(minutes, words_per_minute=150, seed=0):
+    """Random interview-like segments totalling about minutes * words_per_minute words"""
+    rng = random.Random(seed)
+    segments = []
+    words = 0
+    clock = 0.0
+    while words < minutes * words_per_minute:
+        text = " ".join(rng.choice(SAMPLE_SENTENCES) for _ in range(rng.randint(1, 3)))
+        duration = len(text.split()) * 60 / words_per_minute
+        segments.append({"text": text, "start": clock, "end": clock + duration})
+        words += len(text.split())
+        clock += duration
+    return segments
+
+def load_transcript_segments(path):
+    with open(path, encoding="utf-8") as f:
+        data = json.load(f)
+    if isinstance(data, dict):
+        data = data.get("diarized_segments", [])
+    return data
+
+def time_call(fn, repeat):
+    best = float("inf")
+    result = None
+    for _ in range(repeat):
+        start = time.perf_counter()
+        result = fn()
+        best = min(best, time.perf_counter() - start)
+    return best, result
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--minutes", type=float, default=60)
+    parser.add_argument("--model", default=SPACY_MODEL)
+    parser.add_argument("--transcript", help="JSON report or segment list to use instead of synthetic text")
+    parser.add_argument("--batch-size", type=int, default=NER_BATCH_SIZE)
+    parser.add_argument("--processes", type=int, default=2, help="Worker processes for the multi-process run")
+    parser.add_argument("--repeat", type=int, default=3)
+    args = parser.parse_args()
+
+    segments = load_transcript_segments(args.transcript) if args.transcript else synthetic_segments(args.minutes)
+    texts = [seg["text"] for seg in segments]
+    full_text = " ".join(texts)
+    n_words = len(full_text.split())
+    print(f"Transcript: {len(segments)} segments, {n_words} words")
+
+    full_nlp = spacy.load(args.model)
+    full_nlp.max_length = max(full_nlp.max_length, len(full_text) + 1)
+    trimmed_nlp = spacy.load(args.model, exclude=["tagger", "parser", "attribute_ruler", "lemmatizer", "senter"])
+    if "tok2vec" in trimmed_nlp.pipe_names and "ner" not in getattr(trimmed_nlp.get_pipe("tok2vec"), "listening_components", []):
+        trimmed_nlp.disable_pipe("tok2vec")
+    print(f"Full pipeline: {full_nlp.pipe_names}")
+    print(f"Trimmed pipeline: {[name for name in trimmed_nlp.pipe_names if name not in trimmed_nlp.disabled]}")
+
+    runs = [
+        ("full nlp(text)", lambda: len(full_nlp(full_text).ents)),
+        ("trimmed pipe", lambda: sum(len(doc.ents) for doc in trimmed_nlp.pipe(texts, batch_size=args.batch_size))),
+        (f"trimmed pipe x{args.processes}", lambda: sum(len(doc.ents) for doc in trimmed_nlp.pipe(
+            texts, batch_size=args.batch_size, n_process=args.processes))),
+    ]
+
+    print(f"\n{'mode':24} {'seconds':>9} {'words/s':>10} {'entities':>9}")
+    baseline = None
+    for name, fn in runs:
+        seconds, n_entities = time_call(fn, args.repeat)
+        baseline = baseline or seconds
+        print(f"{name:24} {seconds:9.2f} {n_words / seconds:10.0f} {n_entities:9d}  ({baseline / seconds:.1f}x)")
+
+if __name__ == "__main__":
+    main()
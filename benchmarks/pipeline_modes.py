@@ -0,0 +1,52 @@
+"""End-to-end wall time of run_full_pipeline in sequential, concurrent and streaming mode
+
+For streaming mode the time until the first partial segment reaches on_segment is also shown.
+
+Usage:
+    python -m benchmarks.pipeline_modes interview.wav [more files] [--repeat 1]
+
+Models are warmed first so load time is not counted, and the artifact cache is off so every
+mode computes every stage. Gemini calls are made as configured.
+"""
+import argparse
+import time
+from model_registry import warm_models
+from pipeline import run_full_pipeline
+
+MODES = ["sequential", "concurrent", "streaming"]
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("audio", nargs="+")
+    parser.add_argument("--repeat", type=int, default=1)
+    args = parser.parse_args()
+
+    warm_models()
+    rows = []
+    for path in args.audio:
+        row = {"file": path}
+        for mode in MODES:
+            best = float("inf")
+            first_segment = float("inf")
+            for _ in range(args.repeat):
+                arrivals = []
+                start = time.perf_counter()
+                results = run_full_pipeline(path, mode=mode, use_cache=False, on_segment=lambda _: arrivals.append(time.perf_counter()))
+                best = min(best, time.perf_counter() - start)
+                if arrivals:
+                    first_segment = min(first_segment, arrivals[0] - start)
+            row[mode] = best
+            if mode == "streaming":
+                row["first_segment"] = first_segment
+            row["duration"] = results["audio_metadata"]["duration"]
+        rows.append(row)
+
+    print(f"\n{'file':40} {'audio s':>8} {'sequential s':>13} {'concurrent s':>13} {'streaming s':>12} "
+          f"{'first seg s':>12} {'speedup':>8}")
+    for row in rows:
+        print(f"{row['file'][-40:]:40} {row['duration']:8.1f} {row['sequential']:13.2f} "
+              f"{row['concurrent']:13.2f} {row['streaming']:12.2f} {row['first_segment']:12.2f} "
+              f"{row['sequential'] / min(row['concurrent'], row['streaming']):7.2f}x")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,244 @@
+"""Per-stage benchmark on synthetic interviews, with a JSON history and regression thresholds
+
+Usage:
+    python -m benchmarks.suite --duration 120 600 [--speakers 2] [--repeat 3]
+        [--models local|installed] [--history benchmark_history.json] [--thresholds thresholds.json]
+
+Gemini is always replaced by a deterministic local stand-in. With --models local (the default)
+Whisper, the sentiment model, spaCy and the sentence embedder are stand-ins too, so the suite runs
+offline on a CPU-only box; transcription then times only the stand-in. With --models installed the
+configured models are used (run once online, or with HF_HUB_OFFLINE=1 after the weights are cached).
+
+Every run is appended to the history file. A stage fails when it is slower than --max-regression
+times the median of the previous comparable runs (same parameters and host), or slower than
+the per-audio-minute budget in the thresholds file, e.g.
+    {"max_regression": 1.25, "stages": {"diarization": {"max_seconds_per_audio_minute": 2.0}}}
+The exit code is 1 when any check fails.
+"""
+import argparse
+import json
+import os
+import platform
+import statistics
+import subprocess
+import sys
+import tempfile
+from datetime import datetime
+from benchmarks.synthetic import write_interview
+from benchmarks.stand_ins import ScriptedWhisper, use_local_gemini, use_local_models
+from model_registry import warm_models, get_model, get_model_stats
+from instrumentation import measure_call
+from audio_ingest import load_and_preprocess_audio, remove_silence, remap_segments
+from transcribe_whisper import transcribe_audio_from_array
+from pipeline import stage_diarization
+from diarize import determine_candidate_speaker, get_candidate_segments, get_candidate_transcript
+from clean_transcript import clean_transcript_segments, format_transcript_for_display
+from sentiment import analyze_segment_sentiments, aggregate_sentiment
+from skills_extractor import extract_candidate_info
+from summarize_and_decide import generate_evaluation
+from report_exporter import export_txt, export_json, export_pdf
+from config import VAD_ENABLED
+
+HISTORY_WINDOW = 5
+
+def _sentiment(segments, candidate_speaker):
+    segment_sentiments = analyze_segment_sentiments(segments)
+    return aggregate_sentiment([seg for seg in segment_sentiments if seg.get("speaker") == candidate_speaker])
+
+def diarization_accuracy(diarized_segments, script):
+    """Share of diarized speech time whose label agrees with the script after mapping each label to its majority speaker"""
+    overlap = {}
+    for seg in diarized_segments:
+        for turn in script:
+            shared = min(seg["end"], turn["end"]) - max(seg["start"], turn["start"])
+            if shared > 0:
+                key = (seg["speaker"], turn["speaker"])
+                overlap[key] = overlap.get(key, 0.0) + shared
+    total = sum(overlap.values())
+    if not total:
+        return 0.0
+    best = {}
+    for (label, speaker), seconds in overlap.items():
+        best[label] = max(best.get(label, 0.0), seconds)
+    return sum(best.values()) / total
+
+def run_once(audio_path, output_dir, script):
+    """Time every stage once; returns (stage metrics, checks)"""
+    stages = {}
+
+    def timed(name, func, **kwargs):
+        result, metrics = measure_call(name, func, kwargs)
+        stages[name] = metrics
+        return result
+
+    audio_array, sample_rate = timed("audio", load_and_preprocess_audio, file_path=audio_path)
+    speech = timed("vad", remove_silence, audio=audio_array, sr=sample_rate, enabled=VAD_ENABLED)
+    whisper = get_model("whisper")
+    if isinstance(whisper, ScriptedWhisper):
+        whisper.offset_map = speech["offset_map"]
+    compact_segments, full_transcript = timed("transcription", transcribe_audio_from_array,
+                                              audio_array=speech["audio"], sample_rate=sample_rate)
+    whisper_segments = remap_segments(compact_segments, speech["offset_map"], sample_rate)
+    diarized = timed("diarization", stage_diarization, speech=speech, transcription=(whisper_segments, full_transcript))
+    candidate_speaker = timed("candidate_speaker", determine_candidate_speaker, diarized_segments=diarized)
+    cleaned = timed("cleaning", clean_transcript_segments, segments=diarized)
+    sentiment = timed("sentiment", _sentiment, segments=cleaned, candidate_speaker=candidate_speaker)
+    candidate_segments = get_candidate_segments(cleaned, candidate_speaker)
+    candidate_transcript = get_candidate_transcript(cleaned, candidate_speaker)
+    skills = timed("skills", extract_candidate_info, text=candidate_transcript, segments=candidate_segments)
+    evaluation = timed("evaluation", generate_evaluation, transcript=format_transcript_for_display(cleaned),
+                       sentiment=sentiment, skills_info=skills, diarized_segments=cleaned)
+
+    results = {
+        'audio_metadata': {'duration': len(audio_array) / sample_rate, 'sample_rate': sample_rate},
+        'full_transcript': full_transcript,
+        'diarized_segments': cleaned,
+        'candidate_segments': candidate_segments,
+        'candidate_transcript': candidate_transcript,
+        'sentiment': sentiment,
+        'segment_sentiments': [],
+        'skills_info': skills,
+        'evaluation': evaluation,
+        'candidate_speaker': candidate_speaker,
+    }
+    base_path = os.path.join(output_dir, "report")
+    for name, exporter, extension in (("export_txt", export_txt, "txt"), ("export_json", export_json, "json"),
+                                      ("export_pdf", export_pdf, "pdf")):
+        timed(name, exporter, results=results, file_path=f"{base_path}.{extension}")
+
+    checks = {
+        "expected_speakers": len({turn["speaker"] for turn in script}),
+        "detected_speakers": len({seg["speaker"] for seg in diarized}),
+        "diarization_accuracy": diarization_accuracy(diarized, script),
+        "segments": len(whisper_segments),
+        "vad_skipped_fraction": speech["skipped_fraction"],
+    }
+    return stages, checks
+
+def _git_commit():
+    try:
+        return subprocess.run(["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True,
+                              check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+def _host():
+    return {"node": platform.node(), "machine": platform.machine(), "cpus": os.cpu_count(),
+            "python": platform.python_version()}
+
+def benchmark(duration, speakers, seed, models, repeat, output_dir, dead_air=0.0):
+    """Best-of-repeat stage timings for one synthetic interview, as a history entry"""
+    audio_path = os.path.join(output_dir, f"interview_{int(duration)}s_{speakers}spk_seed{seed}.wav")
+    script = write_interview(audio_path, duration, speakers, seed, dead_air_seconds=dead_air)
+    if models == "local":
+        use_local_models(script)
+    warm_models()
+
+    best, checks = None, None
+    for _ in range(repeat):
+        stages, checks = run_once(audio_path, output_dir, script)
+        if best is None:
+            best = stages
+        else:
+            best = {name: min(best[name], stages[name], key=lambda m: m["wall_seconds"]) for name in stages}
+
+    total = sum(metrics["wall_seconds"] for metrics in best.values())
+    return {
+        "timestamp": datetime.now().isoformat(timespec="seconds"),
+        "commit": _git_commit(),
+        "host": _host(),
+        "params": {"duration": duration, "speakers": speakers, "seed": seed, "models": models, "dead_air": dead_air},
+        "repeat": repeat,
+        "audio_seconds": duration,
+        "total_seconds": total,
+        "realtime_factor": total / duration,
+        "stages": best,
+        "checks": checks,
+        "model_loads": get_model_stats(),
+    }
+
+def load_history(path):
+    if not os.path.exists(path):
+        return []
+    with open(path, encoding="utf-8") as f:
+        return json.load(f)
+
+def save_history(path, history):
+    tmp_path = f"{path}.tmp"
+    with open(tmp_path, "w", encoding="utf-8") as f:
+        json.dump(history, f, indent=2)
+    os.replace(tmp_path, path)
+
+def compare(entry, history, thresholds):
+    """Failed checks for entry against comparable history entries and per-minute budgets"""
+    failures = []
+    max_regression = thresholds.get("max_regression", 1.25)
+    previous = [old for old in history if old["params"] == entry["params"] and old["host"] == entry["host"]]
+    previous = previous[-HISTORY_WINDOW:]
+    audio_minutes = entry["audio_seconds"] / 60
+
+    for name, metrics in entry["stages"].items():
+        wall = metrics["wall_seconds"]
+        baseline = [old["stages"][name]["wall_seconds"] for old in previous if name in old["stages"]]
+        if baseline:
+            median = statistics.median(baseline)
+            # Sub-10ms stages are too noisy to compare by ratio
+            if wall > 0.01 and wall > max_regression * median:
+                failures.append(f"{name}: {wall:.3f}s vs median {median:.3f}s of {len(baseline)} previous runs")
+        budget = thresholds.get("stages", {}).get(name, {}).get("max_seconds_per_audio_minute")
+        if budget is not None and wall > budget * audio_minutes:
+            failures.append(f"{name}: {wall / audio_minutes:.3f}s per audio minute exceeds budget {budget:.3f}s")
+    return failures
+
+def print_entry(entry):
+    print(f"\n{entry['params']['duration']:.0f}s audio, {entry['params']['speakers']} speakers, {entry['params']['models']} models")
+    print(f"{'stage':20} {'wall s':>9} {'cpu s':>9} {'peak MB':>9}")
+    for name, metrics in entry["stages"].items():
+        print(f"{name:20} {metrics['wall_seconds']:9.3f} {metrics['process_cpu_seconds'] + metrics['child_cpu_seconds']:9.3f} {metrics['peak_rss_mb']:9.0f}")
+    print(f"{'total':20} {entry['total_seconds']:9.3f}   ({entry['realtime_factor']:.3f}x realtime)")
+    checks = entry["checks"]
+    print(f"speakers {checks['detected_speakers']}/{checks['expected_speakers']}, "
+          f"diarization accuracy {checks['diarization_accuracy']:.1%}, VAD skipped {checks['vad_skipped_fraction']:.1%}")
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--duration", type=float, nargs="+", default=[120.0], help="Synthetic interview lengths in seconds")
+    parser.add_argument("--speakers", type=int, default=2)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--dead-air", type=float, default=0.0, help="Seconds of silence before some questions, to exercise VAD")
+    parser.add_argument("--repeat", type=int, default=1, help="Runs per interview; the fastest run of each stage is kept")
+    parser.add_argument("--models", choices=["local", "installed"], default="local")
+    parser.add_argument("--gemini-latency", type=float, default=0.0, help="Simulated Gemini round trip in seconds")
+    parser.add_argument("--history", default="benchmark_history.json")
+    parser.add_argument("--thresholds", help="JSON file with max_regression and per-stage budgets")
+    parser.add_argument("--max-regression", type=float, help="Overrides max_regression from the thresholds file")
+    args = parser.parse_args()
+
+    thresholds = {}
+    if args.thresholds:
+        with open(args.thresholds, encoding="utf-8") as f:
+            thresholds = json.load(f)
+    if args.max_regression is not None:
+        thresholds["max_regression"] = args.max_regression
+
+    use_local_gemini(args.gemini_latency)
+    history = load_history(args.history)
+    failures = []
+    with tempfile.TemporaryDirectory(prefix="interview_benchmark_") as output_dir:
+        for duration in args.duration:
+            entry = benchmark(duration, args.speakers, args.seed, args.models, args.repeat, output_dir, args.dead_air)
+            print_entry(entry)
+            failures.extend(compare(entry, history, thresholds))
+            history.append(entry)
+    save_history(args.history, history)
+    print(f"\nAppended {len(args.duration)} runs to {args.history}")
+
+    if failures:
+        print("\nRegressions:")
+        for failure in failures:
+            print(f"  {failure}")
+        sys.exit(1)
+    print("No regressions")
+
+if __name__ == "__main__":
+    main()
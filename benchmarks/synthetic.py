@@ -0,0 +1,121 @@
+"""Synthetic multi-speaker interview audio with a known script
+
+Each speaker gets a harmonic "voice" with its own pitch and formants, and words are voiced
+bursts separated by short gaps, so voice embeddings separate speakers the way they do on speech.
+The script (who says what, when) is returned alongside the audio so stand-in transcribers and
+accuracy checks can use it.
+"""
+import numpy as np
+import soundfile as sf
+
+SAMPLE_RATE = 16000
+WORDS_PER_SECOND = 2.6
+
+# (pitch Hz, formant centres Hz) per speaker; speaker 0 is the candidate
+VOICES = [
+    (125.0, (700.0, 1200.0, 2600.0)),
+    (210.0, (850.0, 1900.0, 2900.0)),
+    (160.0, (500.0, 1500.0, 2400.0)),
+    (240.0, (950.0, 2200.0, 3200.0)),
+]
+
+QUESTIONS = [
+    "Tell me about yourself and your background.",
+    "What did you do in your last role?",
+    "How do you handle a difficult customer?",
+    "Which tools do you use every day?",
+    "Why do you want to work with us?",
+    "Can you describe a project you are proud of?",
+    "How do you manage your time when deadlines collide?",
+    "What languages do you speak?",
+]
+
+ANSWERS = [
+    "I worked in {skill} at {org} for {years} years and I really enjoyed the team.",
+    "Most of my day was spent in {tool} and {tool2}, building reports for {org}.",
+    "I have a Bachelor in {degree} and I moved into {skill} after university.",
+    "I speak {language} and English, which helped a lot with international clients.",
+    "At {org} I led a small team and we improved {skill} results over {years} years.",
+    "Honestly it was stressful at times, but I stayed calm and focused on the customer.",
+    "I prefer to plan the week in {tool}, then review progress with my manager every Friday.",
+    "We launched a new {skill} campaign that brought in a lot of new customers.",
+]
+
+FILLERS = {
+    "skill": ["sales", "marketing", "customer service", "project management", "content creation", "data entry"],
+    "org": ["Acme Corporation", "Globex", "Initech", "Umbrella Group", "Stark Industries"],
+    "tool": ["Microsoft Excel", "Google Sheets", "PowerPoint", "Google Docs", "Microsoft Word"],
+    "degree": ["Computer Science", "Engineering", "Business"],
+    "language": ["Italian", "Spanish"],
+}
+
+def _fill(template, rng):
+    values = {key: options[rng.integers(len(options))] for key, options in FILLERS.items()}
+    values["tool2"] = FILLERS["tool"][rng.integers(len(FILLERS["tool"]))]
+    values["years"] = int(rng.integers(1, 9))
+    return template.format(**values)
+
+def generate_script(duration_seconds, num_speakers=2, seed=0, dead_air_seconds=0.0):
+    """Alternating interviewer/candidate turns filling roughly duration_seconds
+
+    Returns a list of {"speaker", "start", "end", "text"} turns; speaker 0 is the candidate and
+    the remaining speakers take turns asking questions. With dead_air_seconds, roughly one
+    question in four is preceded by that much silence.
+    """
+    rng = np.random.default_rng(seed)
+    script = []
+    t = 0.5
+    question_index = 0
+    while True:
+        interviewer = 1 + question_index % max(num_speakers - 1, 1)
+        question = QUESTIONS[rng.integers(len(QUESTIONS))]
+        answer = " ".join(_fill(ANSWERS[rng.integers(len(ANSWERS))], rng) for _ in range(rng.integers(1, 4)))
+        question_index += 1
+        if dead_air_seconds and rng.random() < 0.25:
+            t += dead_air_seconds
+
+        for speaker, text in ((interviewer, question), (0, answer)):
+            length = len(text.split()) / WORDS_PER_SECOND
+            if t + length > duration_seconds:
+                return script
+            script.append({"speaker": speaker, "start": round(t, 3), "end": round(t + length, 3), "text": text})
+            t += length + rng.uniform(0.4, 1.0)
+
+def _voice(num_samples, speaker, rng, sr):
+    """One voiced burst: harmonics of a wobbling pitch shaped by the speaker's formants"""
+    pitch, formants = VOICES[speaker % len(VOICES)]
+    t = np.arange(num_samples) / sr
+    f0 = pitch * (1 + 0.06 * np.sin(2 * np.pi * rng.uniform(2, 5) * t + rng.uniform(0, 2 * np.pi)))
+    phase = 2 * np.pi * np.cumsum(f0) / sr
+
+    signal = np.zeros(num_samples)
+    for k in range(1, int(3800 // pitch) + 1):
+        gain = sum(np.exp(-((k * pitch - centre) / 180.0) ** 2) for centre in formants) + 0.05 / k
+        signal += gain * np.sin(k * phase)
+    envelope = np.sin(np.pi * np.arange(num_samples) / num_samples) ** 0.5
+    return signal * envelope
+
+def synthesize(script, duration_seconds, sr=SAMPLE_RATE, seed=0):
+    """Render a script to float32 audio at sr"""
+    rng = np.random.default_rng(seed + 1)
+    audio = 0.002 * rng.standard_normal(int(duration_seconds * sr))
+    for turn in script:
+        words = turn["text"].split()
+        word_seconds = (turn["end"] - turn["start"]) / len(words)
+        for i in range(len(words)):
+            start = int((turn["start"] + i * word_seconds) * sr)
+            length = int(word_seconds * rng.uniform(0.6, 0.85) * sr)
+            burst = _voice(length, turn["speaker"], rng, sr)
+            audio[start:start + length] += 0.25 * burst / (np.abs(burst).max() + 1e-9)
+    return audio.astype(np.float32)
+
+def generate_interview(duration_seconds, num_speakers=2, seed=0, sr=SAMPLE_RATE, dead_air_seconds=0.0):
+    """Synthetic interview audio and its script"""
+    script = generate_script(duration_seconds, num_speakers, seed, dead_air_seconds)
+    return synthesize(script, duration_seconds, sr, seed), script
+
+def write_interview(path, duration_seconds, num_speakers=2, seed=0, sr=SAMPLE_RATE, dead_air_seconds=0.0):
+    """Write a synthetic interview to an audio file and return its script"""
+    audio, script = generate_interview(duration_seconds, num_speakers, seed, sr, dead_air_seconds)
+    sf.write(path, audio, sr)
+    return script
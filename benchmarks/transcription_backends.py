@@ -0,0 +1,107 @@
+"""Speed and word error rate of the transcription backends on local files
+
+Usage:
+    python -m benchmarks.transcription_backends interview1.wav interview2.mp3
+        [--backends openai-whisper faster-whisper] [--model-size small] [--references refs.json]
+
+A reference transcript is read from <audio stem>.txt next to each file, or from a JSON file
+mapping file names to text. Files without a reference are scored against the first backend's
+transcript, which measures agreement rather than accuracy.
+"""
+import argparse
+import json
+import os
+import re
+import time
+import numpy as np
+from audio_ingest import load_and_preprocess_audio
+from transcription_backends import BACKENDS, load_transcription_backend
+from config import WHISPER_MODEL_SIZE
+
+def normalize_words(text):
+    """Lowercased words without punctuation, for scoring"""
+    return re.sub(r"[^\w\s']", " ", text.lower()).split()
+
+def word_errors(reference, hypothesis):
+    """Word-level edit distance (substitutions + deletions + insertions)"""
+    vocabulary = {}
+    ref = np.array([vocabulary.setdefault(word, len(vocabulary)) for word in reference], dtype=np.int64)
+    hyp = np.array([vocabulary.setdefault(word, len(vocabulary)) for word in hypothesis], dtype=np.int64)
+    if len(ref) == 0 or len(hyp) == 0:
+        return max(len(ref), len(hyp))
+
+    # One DP row per reference word; the insertion chain along a row is a running minimum
+    offsets = np.arange(len(hyp) + 1)
+    previous = offsets.copy()
+    for word in ref:
+        candidates = np.empty(len(hyp) + 1, dtype=np.int64)
+        candidates[0] = previous[0] + 1
+        candidates[1:] = np.minimum(previous[1:] + 1, previous[:-1] + (hyp != word))
+        previous = np.minimum.accumulate(candidates - offsets) + offsets
+    return int(previous[-1])
+
+def load_references(audio_paths, references_path=None):
+    references = {}
+    if references_path:
+        with open(references_path, encoding="utf-8") as f:
+            references.update(json.load(f))
+    for path in audio_paths:
+        name = os.path.basename(path)
+        text_path = os.path.splitext(path)[0] + ".txt"
+        if name not in references and os.path.exists(text_path):
+            with open(text_path, encoding="utf-8") as f:
+                references[name] = f.read()
+    return references
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("audio", nargs="+")
+    parser.add_argument("--backends", nargs="+", default=list(BACKENDS), choices=list(BACKENDS))
+    parser.add_argument("--model-size", default=WHISPER_MODEL_SIZE)
+    parser.add_argument("--references", help="JSON file mapping audio file names to reference transcripts")
+    args = parser.parse_args()
+
+    audio = {os.path.basename(path): load_and_preprocess_audio(path) for path in args.audio}
+    references = load_references(args.audio, args.references)
+    total_audio = sum(len(samples) / sr for samples, sr in audio.values())
+
+    rows = []
+    transcripts = {}
+    for backend_name in args.backends:
+        start = time.perf_counter()
+        backend = load_transcription_backend(backend_name, args.model_size)
+        load_seconds = time.perf_counter() - start
+
+        seconds = 0.0
+        transcripts[backend_name] = {}
+        for name, (samples, _) in audio.items():
+            start = time.perf_counter()
+            transcripts[backend_name][name] = backend.transcribe(samples)["text"]
+            seconds += time.perf_counter() - start
+        rows.append({"backend": backend_name, "load": load_seconds, "seconds": seconds})
+        del backend
+
+    baseline = args.backends[0]
+    for row in rows:
+        errors = words = 0
+        scored_against_baseline = False
+        for name in audio:
+            if name in references:
+                reference = references[name]
+            else:
+                reference = transcripts[baseline][name]
+                scored_against_baseline = True
+            reference_words = normalize_words(reference)
+            errors += word_errors(reference_words, normalize_words(transcripts[row["backend"]][name]))
+            words += len(reference_words)
+        row["wer"] = errors / words if words else 0.0
+        row["wer_note"] = f"vs {baseline}" if scored_against_baseline else ""
+
+    print(f"\n{total_audio:.1f}s of audio in {len(audio)} files, model size '{args.model_size}'")
+    print(f"{'backend':16} {'load s':>7} {'transcribe s':>13} {'x realtime':>11} {'WER':>7}")
+    for row in rows:
+        print(f"{row['backend']:16} {row['load']:7.1f} {row['seconds']:13.1f} {total_audio / row['seconds']:10.1f}x "
+              f"{row['wer']:7.1%} {row['wer_note']}")
+
+if __name__ == "__main__":
+    main()
@@ -9,9 +9,27 @@ genai.configure(api_key = API_KEY)
 
 # Model Configuration
 WHISPER_MODEL_SIZE = "small"
+TRANSCRIPTION_BACKEND = os.getenv("TRANSCRIPTION_BACKEND", "openai-whisper")  # or "faster-whisper" (pip install -r requirements-optional.txt)
+FASTER_WHISPER_COMPUTE_TYPE = "int8"  # CTranslate2 quantization: int8, int8_float32, float32
+FASTER_WHISPER_CPU_THREADS = 0  # 0 lets CTranslate2 decide
+PREVIEW_WHISPER_MODEL_SIZE = "tiny"  # draft transcript shown while the full analysis runs
+PREVIEW_MAX_SECONDS = 300  # speech covered by the draft transcript, so it stays quick on long files
+TRANSCRIPTION_LANGUAGE = os.getenv("TRANSCRIPTION_LANGUAGE")  # e.g. "en"; None detects it once per file
+LANGUAGE_DETECT_SECONDS = 30  # speech used for that one detection
+# Whisper decoding options; temperatures after the first are fallback retries for windows that fail
+DECODING_PROFILES = {
+    "reference": {"beam_size": 1, "best_of": 5, "temperature": (0.0, 0.2, 0.4, 0.6, 0.8, 1.0), "condition_on_previous_text": True},
+    "accurate": {"beam_size": 5, "best_of": 5, "temperature": (0.0, 0.2, 0.4, 0.6, 0.8, 1.0), "condition_on_previous_text": True},
+    "balanced": {"beam_size": 1, "best_of": 3, "temperature": (0.0, 0.4, 0.8), "condition_on_previous_text": False},
+    "fast": {"beam_size": 1, "temperature": (0.0,), "condition_on_previous_text": False},
+}
+# "reference" matches openai-whisper's own defaults, so transcripts do not change; the faster
+# profiles are opt-in until benchmarks.decoding_profiles shows their WER and speed on real interviews
+DECODING_PROFILE = os.getenv("DECODING_PROFILE", "reference")
+PREVIEW_DECODING_PROFILE = "fast"
 SENTIMENT_MODEL = "cardiffnlp/twitter-roberta-base-sentiment-latest"
 EMBEDDING_MODEL = "all-MiniLM-L6-v2"
-SPACY_MODEL = "en_core_web_lg"
+SPACY_MODEL = "en_core_web_lg"  # en_core_web_sm / en_core_web_md trade some NER accuracy for speed
 GEMINI_MODEL = "gemini-2.0-flash"
 
 # Skills Ontology
@@ -29,4 +47,89 @@ MASTER_SKILLS = TECH_SKILLS + LANGUAGE_SKILLS + TOOLS + DEGREES
 
 # Audio Processing
 SAMPLE_RATE = 16000
-MAX_AUDIO_DURATION = 3600
\ No newline at end of file
+MAX_AUDIO_DURATION = 3600
+STREAMING_AUDIO_DECODE = True  # decode in blocks into a memory-mapped PCM file instead of one in-memory array
+AUDIO_DECODE_BLOCK_SECONDS = 10
+AUDIO_SCRATCH_DIR = os.getenv("INTERVIEW_ANALYZER_SCRATCH_DIR")  # None uses the system temp directory
+FFMPEG_BINARY = os.getenv("FFMPEG_BINARY", "ffmpeg")  # decodes MP3/M4A when available
+
+# Voice Activity Detection - silences longer than VAD_MIN_SILENCE_SECONDS are cut before transcription
+VAD_ENABLED = True
+VAD_AGGRESSIVENESS = 2  # webrtcvad mode, 0 (keeps most) to 3 (cuts most)
+VAD_FRAME_MS = 30
+VAD_MIN_SPEECH_SECONDS = 0.2
+VAD_MIN_SILENCE_SECONDS = 1.0
+VAD_PADDING_SECONDS = 0.25
+
+# Long-audio Transcription
+CHUNKED_TRANSCRIPTION = True
+TRANSCRIBE_CHUNK_SECONDS = 300
+TRANSCRIBE_SPLIT_SEARCH_SECONDS = 30
+TRANSCRIBE_WORKERS = int(os.getenv("TRANSCRIBE_WORKERS", "2"))
+STREAM_CHUNK_SECONDS = 60  # audio decoded per step when the backend cannot stream segments itself
+STREAM_SENTIMENT_BATCH_SIZE = 8  # segments scored together while streaming
+
+# Diarization
+DIARIZATION_EMBEDDING_MODE = "windowed"  # "windowed" (one encoder pass) or "segment" (per-segment)
+EMBEDDING_WINDOW_RATE = 2  # partial embeddings per second of audio
+EMBEDDING_BATCH_SIZE = 256
+DIARIZATION_MAX_DISTANCE_SEGMENTS = 2000  # cap on segments in the silhouette distance matrix
+DIARIZATION_MAX_LINKAGE_SEGMENTS = 2000  # above this, segments are grouped into this many centroids before linkage
+ONLINE_DIARIZATION_THRESHOLD = 0.75  # cosine similarity to join a provisional speaker while streaming
+CHANGE_POINT_DETECTION = True  # split Whisper segments where the speaker changes (windowed mode only)
+CHANGE_POINT_THRESHOLD = 0.2  # cosine distance between the voices on either side of a change
+CHANGE_POINT_MIN_WINDOWS = 2  # embedding windows needed on each side of a change
+CHANGE_POINT_CONTEXT_WINDOWS = 4  # windows compared on each side of a candidate change
+CHANGE_POINT_MAX_CHANGES = 4  # per segment, bounding the search cost
+# Word alignment slows openai-whisper decoding (see benchmarks.decoding_profiles); only change-point splits use it
+WORD_TIMESTAMPS = CHANGE_POINT_DETECTION and DIARIZATION_EMBEDDING_MODE == "windowed"
+
+# Sentiment
+SENTIMENT_BATCH_SIZE = 32
+SENTIMENT_NUM_THREADS = None  # None keeps torch's default thread count
+SENTIMENT_WINDOW_OVERLAP = 64  # tokens shared by consecutive windows of long texts
+
+# Caching
+CACHE_DIR = os.getenv("INTERVIEW_ANALYZER_CACHE_DIR", os.path.join(os.path.expanduser("~"), ".cache", "interview_analyzer"))
+EMBEDDING_CACHE_PATH = os.path.join(CACHE_DIR, "phrase_embeddings.sqlite")
+EMBEDDING_CACHE_SIZE = 200000  # phrases kept in the in-memory LRU
+SKILL_INDEX_DIR = os.path.join(CACHE_DIR, "skill_index")
+CACHE_DB_TIMEOUT = 30  # seconds a cache database waits for another process's write lock
+
+# Skill Ontology Index
+SKILL_ONTOLOGY_PATH = os.getenv("SKILL_ONTOLOGY_PATH")  # JSON/JSONL/CSV taxonomy; None uses the lists above
+SKILL_MATCH_THRESHOLD = 0.60
+SKILL_QUERY_BATCH_SIZE = 512  # phrases scored per batch
+SKILL_INDEX_CHUNK_SIZE = 8192  # index rows scored per block
+
+# Named Entity Recognition
+NER_BATCH_SIZE = 64
+NER_N_PROCESS = 1  # >1 runs nlp.pipe in worker processes
+
+# Pipeline Scheduling
+# "concurrent" overlaps independent stages, "sequential" runs them in order, "streaming" consumes
+# segments as they are transcribed. Streaming shows the first segments within seconds, but without
+# faster-whisper it decodes STREAM_CHUNK_SECONDS chunks one at a time instead of spreading them over
+# TRANSCRIBE_WORKERS processes, so the full analysis can finish later than in "concurrent" mode
+PIPELINE_MODE = os.getenv("PIPELINE_MODE", "concurrent")
+STAGE_RESOURCE_LIMITS = {"cpu": 2, "network": 4}  # max stages running at once per resource
+FULL_ANALYSIS_WORKERS = int(os.getenv("FULL_ANALYSIS_WORKERS", "2"))  # background full analyses running at once, shared by every app session
+
+# Instrumentation
+METRICS_LOG_PATH = os.getenv("INTERVIEW_ANALYZER_METRICS_LOG")  # JSONL file; None disables the log
+PROFILE_DIR = os.getenv("INTERVIEW_ANALYZER_PROFILE_DIR")  # per-stage cProfile dumps; None disables profiling
+
+# Stage Artifact Cache
+ARTIFACT_CACHE_ENABLED = True
+ARTIFACT_CACHE_DIR = os.path.join(CACHE_DIR, "artifacts")
+ARTIFACT_CACHE_MAX_BYTES = 5 * 1024 ** 3
+ARTIFACT_CACHE_VERSION = 1  # bump to invalidate every cached artifact after output format changes
+
+# Candidate Speaker Detection
+# Lead of the best speaker's score over the runner-up below which the local classifier defers to
+# Gemini. A clear interview (candidate talks ~70% of the time, interviewer asks the questions
+# and opens) leads by about 2.5; speakers with similar talk time and questions lead by under 1
+CANDIDATE_MIN_MARGIN = 1.0
+
+# Batch Processing
+BATCH_WORKERS = 2
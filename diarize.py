@@ -1,56 +1,317 @@
+import re
 import numpy as np
 import librosa
-from resemblyzer import VoiceEncoder, preprocess_wav
-from sklearn.cluster import AgglomerativeClustering
-from sklearn.metrics import silhouette_score
+import torch
+from resemblyzer import preprocess_wav
+from resemblyzer.audio import normalize_volume, wav_to_mel_spectrogram
+from resemblyzer.hparams import sampling_rate as ENCODER_SAMPLE_RATE, audio_norm_target_dBFS
+from scipy.cluster.hierarchy import linkage, cut_tree
+from sklearn.cluster import MiniBatchKMeans
+from sklearn.metrics import silhouette_score, pairwise_distances
 from config import WHISPER_MODEL_SIZE
 import google.generativeai as genai
-from config import GEMINI_MODEL
+from config import GEMINI_MODEL, DIARIZATION_EMBEDDING_MODE, EMBEDDING_WINDOW_RATE, EMBEDDING_BATCH_SIZE, DIARIZATION_MAX_DISTANCE_SEGMENTS, DIARIZATION_MAX_LINKAGE_SEGMENTS, CANDIDATE_MIN_MARGIN, ONLINE_DIARIZATION_THRESHOLD
+from config import CHANGE_POINT_DETECTION, CHANGE_POINT_THRESHOLD, CHANGE_POINT_MIN_WINDOWS, CHANGE_POINT_CONTEXT_WINDOWS, CHANGE_POINT_MAX_CHANGES
+from model_registry import get_model
 
 model = genai.GenerativeModel(GEMINI_MODEL)
 
-# Load models
-encoder = VoiceEncoder()
-
 def get_segment_embedding_from_array(audio_array, sample_rate, start, end):
     """Get embedding from audio array segment"""
     segment = audio_array[int(start * sample_rate):int(end * sample_rate)]
     segment = preprocess_wav(segment)
-    embed = encoder.embed_utterance(segment)
+    embed = get_model("voice_encoder").embed_utterance(segment)
     return embed
 
-def detect_num_speakers(embeddings, max_speakers=4):
-    """Your existing speaker detection"""
+def compute_window_embeddings(audio_array, sample_rate, rate=EMBEDDING_WINDOW_RATE, batch_size=EMBEDDING_BATCH_SIZE):
+    """Run the voice encoder once over the whole waveform
+
+    Returns the partial (windowed) embeddings and their (start, end) spans in seconds.
+    Silence is not trimmed so the windows stay on the original timeline.
+    """
+    encoder = get_model("voice_encoder")
+    wav = np.asarray(audio_array, dtype=np.float32)
+    if sample_rate != ENCODER_SAMPLE_RATE:
+        wav = librosa.resample(wav, orig_sr=sample_rate, target_sr=ENCODER_SAMPLE_RATE)
+    wav = normalize_volume(wav, audio_norm_target_dBFS, increase_only=True)
+
+    wav_slices, mel_slices = encoder.compute_partial_slices(len(wav), rate, min_coverage=0.5)
+    if wav_slices[-1].stop > len(wav):
+        wav = np.pad(wav, (0, wav_slices[-1].stop - len(wav)), "constant")
+    mel = wav_to_mel_spectrogram(wav)
+
+    window_embeddings = []
+    with torch.no_grad():
+        for i in range(0, len(mel_slices), batch_size):
+            mels = np.array([mel[s] for s in mel_slices[i:i + batch_size]])
+            mels = torch.from_numpy(mels).to(encoder.device)
+            window_embeddings.append(encoder(mels).cpu().numpy())
+
+    spans = np.array([[s.start, s.stop] for s in wav_slices], dtype=np.float64) / ENCODER_SAMPLE_RATE
+    return np.vstack(window_embeddings), spans
+
+def pool_segment_embeddings(window_embeddings, window_spans, segments):
+    """Embedding per segment as the overlap-weighted mean of the windows it covers"""
+    starts = window_spans[:, 0]
+    window_length = float(np.max(window_spans[:, 1] - starts))
+    centers = window_spans.mean(axis=1)
+
+    pooled = np.zeros((len(segments), window_embeddings.shape[1]), dtype=np.float32)
+    for i, seg in enumerate(segments):
+        # Windows share one length, so only those starting in [start - length, end) can overlap
+        lo = np.searchsorted(starts, seg["start"] - window_length, side="right")
+        hi = np.searchsorted(starts, seg["end"], side="left")
+        overlap = np.minimum(window_spans[lo:hi, 1], seg["end"]) - np.maximum(starts[lo:hi], seg["start"])
+        overlap = np.clip(overlap, 0, None)
+
+        if overlap.sum() > 0:
+            embed = overlap @ window_embeddings[lo:hi]
+        else:
+            nearest = int(np.argmin(np.abs(centers - (seg["start"] + seg["end"]) / 2)))
+            embed = window_embeddings[nearest]
+        pooled[i] = embed / (np.linalg.norm(embed) + 1e-8)
+    return pooled
+
+def compute_segment_embeddings(audio_array, sample_rate, whisper_segments, mode=DIARIZATION_EMBEDDING_MODE):
+    """Speaker embedding for every Whisper segment"""
+    if mode == "windowed":
+        window_embeddings, window_spans = compute_window_embeddings(audio_array, sample_rate)
+        return pool_segment_embeddings(window_embeddings, window_spans, whisper_segments)
+
+    embeddings = []
+    for seg in whisper_segments:
+        emb = get_segment_embedding_from_array(audio_array, sample_rate, seg["start"], seg["end"])
+        embeddings.append(emb)
+    return np.vstack(embeddings)
+
+def _reduce_for_linkage(embeddings, max_segments=DIARIZATION_MAX_LINKAGE_SEGMENTS, seed=0):
+    """(points to link, tree leaf of every segment)
+
+    Ward linkage needs all pairwise distances, so above max_segments segments are first
+    grouped into max_segments MiniBatchKMeans centroids and the tree is built over those.
+    """
+    if len(embeddings) <= max_segments:
+        return embeddings, np.arange(len(embeddings))
+    # Random init and a few passes: the centroids only need to be fine enough to link, and
+    # k-means++ seeding of thousands of centroids would cost more than the linkage it saves
+    kmeans = MiniBatchKMeans(n_clusters=max_segments, init="random", n_init=1, max_iter=3,
+                             batch_size=4 * max_segments, random_state=seed)
+    assignment = kmeans.fit_predict(embeddings)
+    return kmeans.cluster_centers_, assignment
+
+def build_speaker_tree(embeddings):
+    """Ward linkage tree over segment embeddings - built once and cut at any number of speakers
+
+    Returns (tree, tree leaf of every segment); leaves are the segments themselves unless
+    there are more than DIARIZATION_MAX_LINKAGE_SEGMENTS of them.
+    """
+    points, assignment = _reduce_for_linkage(embeddings)
+    return linkage(points, method="ward"), assignment
+
+def _silhouette_sample(n_segments, max_segments=DIARIZATION_MAX_DISTANCE_SEGMENTS, seed=0):
+    """Indices used for silhouette scoring, capped so the distance matrix stays bounded"""
+    if n_segments <= max_segments:
+        return np.arange(n_segments)
+    rng = np.random.default_rng(seed)
+    return np.sort(rng.choice(n_segments, size=max_segments, replace=False))
+
+def _score_tree_cuts(embeddings, tree, max_speakers):
+    """Cut the tree at every candidate k and score each cut on one shared distance matrix"""
+    tree, assignment = tree
+    n_segments = len(embeddings)
+    candidates = list(range(2, min(max_speakers, len(tree)) + 1))
+    if not candidates:
+        return 1, np.zeros(n_segments, dtype=int)
+
+    cuts = cut_tree(tree, n_clusters=candidates)[assignment]
+    sample = _silhouette_sample(n_segments)
+    distances = pairwise_distances(embeddings[sample]).astype(np.float32)
+
     best_score = -1
     best_k = 1
-
-    for k in range(2, max_speakers + 1):
-        clustering = AgglomerativeClustering(n_clusters=k).fit(embeddings)
-        score = silhouette_score(embeddings, clustering.labels_)
+    best_labels = np.zeros(n_segments, dtype=int)
+    for column, k in enumerate(candidates):
+        labels = cuts[:, column]
+        if len(np.unique(labels[sample])) < 2:
+            continue
+        score = silhouette_score(distances, labels[sample], metric="precomputed")
         if score > best_score:
             best_score = score
             best_k = k
+            best_labels = labels
+    return best_k, best_labels
+
+def detect_num_speakers(embeddings, max_speakers=4, tree=None):
+    """Your existing speaker detection"""
+    if tree is None:
+        tree = build_speaker_tree(embeddings)
+    best_k, _ = _score_tree_cuts(embeddings, tree, max_speakers)
     return best_k
 
-def diarize_whisper_segments_from_array(audio_array, sample_rate, whisper_segments, max_speakers=4):
-    """Diarization using audio array instead of file path"""
-    embeddings = []
-    
-    print("Generating speaker embeddings from audio array...")
-    for seg in whisper_segments:
-        emb = get_segment_embedding_from_array(audio_array, sample_rate, seg["start"], seg["end"])
-        embeddings.append(emb)
+def cluster_speaker_embeddings(embeddings, max_speakers=4):
+    """Pick the number of speakers and return one cluster label per embedding"""
+    if len(embeddings) < 2:
+        return np.zeros(len(embeddings), dtype=int)
+
+    tree = build_speaker_tree(embeddings)
+    num_speakers, labels = _score_tree_cuts(embeddings, tree, max_speakers)
+    print(f"Detected speakers: {num_speakers}")
+
+    # Number speakers in order of first appearance so labels are stable between runs
+    order = {}
+    for label in labels:
+        order.setdefault(label, len(order))
+    return np.array([order[label] for label in labels])
+
+def change_scores(window_embeddings, context_windows):
+    """Cosine distance between the mean voices of context_windows windows either side of every boundary
 
-    if not embeddings:
+    Entry k scores the boundary before window k (k = 1 .. n-1); windows near the ends use the
+    shorter context available. Prefix sums make this one vectorized pass over the windows.
+    """
+    n = len(window_embeddings)
+    totals = np.vstack([np.zeros((1, window_embeddings.shape[1]), dtype=np.float64), np.cumsum(window_embeddings, axis=0)])
+    boundaries = np.arange(1, n)
+    left = totals[boundaries] - totals[np.maximum(boundaries - context_windows, 0)]
+    right = totals[np.minimum(boundaries + context_windows, n)] - totals[boundaries]
+    similarity = np.sum(left * right, axis=1) / (np.linalg.norm(left, axis=1) * np.linalg.norm(right, axis=1) + 1e-8)
+    return np.concatenate([[0.0], 1.0 - similarity])
+
+def detect_speaker_changes(window_embeddings, window_spans, start, end, threshold=CHANGE_POINT_THRESHOLD,
+                           min_windows=CHANGE_POINT_MIN_WINDOWS, context_windows=CHANGE_POINT_CONTEXT_WINDOWS,
+                           max_changes=CHANGE_POINT_MAX_CHANGES):
+    """Times in (start, end) where the voice changes, from the windows centered inside
+
+    Every boundary compares a fixed-length context on each side, so a short interjection in the
+    middle of a segment scores as high as one at either end. Local peaks above threshold become
+    changes, strongest first, at least min_windows apart and at most max_changes per segment.
+    The cost is linear in the number of windows however long the audio is.
+    """
+    centers = window_spans.mean(axis=1)
+    lo, hi = np.searchsorted(centers, [start, end])
+    embeddings = window_embeddings[lo:hi]
+    if len(embeddings) < 2 * min_windows:
         return []
+    embeddings = embeddings / (np.linalg.norm(embeddings, axis=1, keepdims=True) + 1e-8)
 
-    embeddings = np.vstack(embeddings)
+    scores = change_scores(embeddings, context_windows)
+    candidates = np.arange(min_windows, len(embeddings) - min_windows + 1)
+    # A boundary is a peak if no boundary within min_windows of it scores higher
+    candidates = [k for k in candidates if scores[k] >= threshold
+                  and scores[k] == scores[max(k - min_windows, 1):k + min_windows + 1].max()]
 
-    num_speakers = detect_num_speakers(embeddings, max_speakers)
-    print(f"Detected speakers: {num_speakers}")
+    changes = []
+    for k in sorted(candidates, key=lambda k: -scores[k]):
+        if len(changes) == max_changes:
+            break
+        if all(abs(k - other) >= min_windows for other in changes):
+            changes.append(k)
+
+    # A change sits between the centers of the last window before it and the first after it
+    return sorted(float((centers[lo + k - 1] + centers[lo + k]) / 2) for k in changes)
+
+def split_segment(segment, change_times):
+    """Pieces of a segment cut at change_times, moved to the nearest word boundary when words are known
+
+    Without word timestamps the text is divided in proportion to time.
+    """
+    words = segment.get("words")
+    if words:
+        gaps = np.array([(w0["end"] + w1["start"]) / 2 for w0, w1 in zip(words, words[1:])])
+        cuts = sorted({int(np.argmin(np.abs(gaps - t))) + 1 for t in change_times}) if len(gaps) else []
+        pieces = []
+        previous = 0
+        for cut in cuts + [len(words)]:
+            group = words[previous:cut]
+            pieces.append({
+                "start": group[0]["start"] if previous else segment["start"],
+                "end": group[-1]["end"] if cut < len(words) else segment["end"],
+                "text": "".join(word["word"] for word in group),
+                "words": group,
+            })
+            previous = cut
+        return pieces if len(pieces) > 1 else [segment]
+
+    tokens = segment["text"].split()
+    duration = segment["end"] - segment["start"]
+    cuts = {}
+    for t in change_times:
+        index = int(round(len(tokens) * (t - segment["start"]) / duration)) if duration > 0 else 0
+        if 0 < index < len(tokens):
+            cuts.setdefault(index, t)
+    if not cuts:
+        return [segment]
+
+    bounds = [(0, segment["start"])] + sorted(cuts.items()) + [(len(tokens), segment["end"])]
+    return [
+        {"start": start, "end": end, "text": " " + " ".join(tokens[a:b])}
+        for (a, start), (b, end) in zip(bounds, bounds[1:])
+    ]
+
+def split_at_speaker_changes(whisper_segments, window_embeddings, window_spans):
+    """Split every segment at its detected speaker changes; returns (pieces, index of each piece's segment)"""
+    pieces = []
+    parents = []
+    num_split = 0
+    for index, seg in enumerate(whisper_segments):
+        changes = detect_speaker_changes(window_embeddings, window_spans, seg["start"], seg["end"])
+        seg_pieces = split_segment(seg, changes) if changes else [seg]
+        num_split += len(seg_pieces) > 1
+        pieces.extend(seg_pieces)
+        parents.extend([index] * len(seg_pieces))
+    if num_split:
+        print(f"Speaker changes split {num_split} of {len(whisper_segments)} segments")
+    return pieces, parents
+
+def _merge_pieces(whisper_segments, pieces, parents, labels):
+    """Diarized segments, joining back adjacent pieces of one segment that got the same speaker"""
+    diarized = []
+    spans = []  # (segment index, pieces joined) per diarized segment
+    for piece, parent, spk in zip(pieces, parents, labels):
+        speaker = f"Speaker_{spk+1}"
+        if diarized and spans[-1][0] == parent and diarized[-1]["speaker"] == speaker:
+            diarized[-1]["end"] = piece["end"]
+            diarized[-1]["text"] += piece["text"]
+            spans[-1][1] += 1
+            continue
+        diarized.append({"speaker": speaker, "start": piece["start"], "end": piece["end"], "text": piece["text"]})
+        spans.append([parent, 1])
+
+    # A segment that ended up whole keeps its original text
+    piece_counts = np.bincount(parents, minlength=len(whisper_segments)) if parents else []
+    for seg, (parent, joined) in zip(diarized, spans):
+        if joined == piece_counts[parent]:
+            seg["text"] = whisper_segments[parent]["text"]
+    return diarized
+
+def diarize_with_windows(window_embeddings, window_spans, whisper_segments, max_speakers=4, split_changes=CHANGE_POINT_DETECTION):
+    """Diarize segments from precomputed window embeddings, splitting them where the speaker changes"""
+    if split_changes:
+        pieces, parents = split_at_speaker_changes(whisper_segments, window_embeddings, window_spans)
+    else:
+        pieces, parents = whisper_segments, list(range(len(whisper_segments)))
+    embeddings = pool_segment_embeddings(window_embeddings, window_spans, pieces)
+    labels = cluster_speaker_embeddings(embeddings, max_speakers)
+    return _merge_pieces(whisper_segments, pieces, parents, labels)
+
+def diarize_whisper_segments_from_array(audio_array, sample_rate, whisper_segments, max_speakers=4, embedding_mode=DIARIZATION_EMBEDDING_MODE,
+                                        split_changes=CHANGE_POINT_DETECTION):
+    """Diarization using audio array instead of file path
+
+    In windowed mode segments are split where the speaker changes, so the result can hold
+    more segments than whisper_segments.
+    """
+    if not whisper_segments:
+        return []
+
+    print("Generating speaker embeddings from audio array...")
+    if embedding_mode == "windowed":
+        window_embeddings, window_spans = compute_window_embeddings(audio_array, sample_rate)
+        return diarize_with_windows(window_embeddings, window_spans, whisper_segments, max_speakers, split_changes)
+
+    embeddings = compute_segment_embeddings(audio_array, sample_rate, whisper_segments, embedding_mode)
 
-    clustering = AgglomerativeClustering(n_clusters=num_speakers)
-    labels = clustering.fit_predict(embeddings)
+    labels = cluster_speaker_embeddings(embeddings, max_speakers)
 
     diarized = []
     for seg, spk in zip(whisper_segments, labels):
@@ -63,8 +324,107 @@ def diarize_whisper_segments_from_array(audio_array, sample_rate, whisper_segmen
 
     return diarized
 
-def determine_candidate_speaker(diarized_segments):
-    """Use Gemini to determine which speaker is the candidate/interviewee"""
+class OnlineSpeakerClustering:
+    """Provisional speaker labels for segments as they arrive, re-labeled in one pass at the end
+
+    Each embedding joins the most similar running speaker centroid if the cosine similarity
+    reaches threshold, otherwise starts a new speaker (up to max_speakers). finalize() clusters
+    every embedding seen with cluster_speaker_embeddings, so the final labels match batch diarization.
+    """
+
+    def __init__(self, max_speakers=4, threshold=ONLINE_DIARIZATION_THRESHOLD):
+        self.max_speakers = max_speakers
+        self.threshold = threshold
+        self.embeddings = []
+        self.labels = []
+        self.centroids = []
+        self.counts = []
+
+    def add(self, embedding):
+        """Provisional label (0-based) for one normalized segment embedding"""
+        embedding = np.asarray(embedding, dtype=np.float32)
+        label = None
+        if self.centroids:
+            centroids = np.array(self.centroids)
+            similarities = centroids @ embedding / (np.linalg.norm(centroids, axis=1) * np.linalg.norm(embedding) + 1e-8)
+            best = int(np.argmax(similarities))
+            if similarities[best] >= self.threshold or len(self.centroids) >= self.max_speakers:
+                label = best
+        if label is None:
+            label = len(self.centroids)
+            self.centroids.append(np.zeros_like(embedding))
+            self.counts.append(0)
+
+        # Running mean of the speaker's embeddings
+        self.counts[label] += 1
+        self.centroids[label] += (embedding - self.centroids[label]) / self.counts[label]
+        self.embeddings.append(embedding)
+        self.labels.append(label)
+        return label
+
+    def finalize(self):
+        """Final labels for every segment added, from clustering all embeddings together"""
+        if not self.embeddings:
+            return np.zeros(0, dtype=int)
+        labels = cluster_speaker_embeddings(np.vstack(self.embeddings), self.max_speakers)
+        provisional = np.array(self.labels)
+        # Segments whose provisional speaker disagrees with the final speaker it mostly became
+        changed = sum(
+            int(np.sum(labels[provisional == p] != np.bincount(labels[provisional == p]).argmax()))
+            for p in np.unique(provisional)
+        )
+        print(f"Final speaker re-labeling changed {changed} of {len(labels)} provisional labels")
+        return labels
+
+def speaker_features(diarized_segments):
+    """Per-speaker talk-time share, question ratio, mean turn length and first-speaker flag"""
+    features = {}
+    previous_speaker = None
+    for seg in diarized_segments:
+        speaker = seg["speaker"]
+        stats = features.setdefault(speaker, {"talk_time": 0.0, "segments": 0, "questions": 0, "turns": 0})
+        stats["talk_time"] += max(seg["end"] - seg["start"], 0.0)
+        stats["segments"] += 1
+        if seg.get("text", "").strip().endswith("?"):
+            stats["questions"] += 1
+        if speaker != previous_speaker:
+            stats["turns"] += 1
+        previous_speaker = speaker
+
+    total_time = sum(stats["talk_time"] for stats in features.values()) or 1.0
+    turn_lengths = {speaker: stats["talk_time"] / max(stats["turns"], 1) for speaker, stats in features.items()}
+    total_turn_length = sum(turn_lengths.values()) or 1.0
+    first_speaker = diarized_segments[0]["speaker"] if diarized_segments else None
+
+    return {
+        speaker: {
+            "talk_share": stats["talk_time"] / total_time,
+            "question_ratio": stats["questions"] / max(stats["segments"], 1),
+            "turn_share": turn_lengths[speaker] / total_turn_length,
+            "speaks_first": speaker == first_speaker,
+        }
+        for speaker, stats in features.items()
+    }
+
+def score_candidate_speakers(diarized_segments):
+    """How candidate-like each speaker is, from local conversation features
+
+    Candidates talk more, ask fewer questions and take longer turns; interviewers usually open.
+    Scores range from -0.5 to 4.5 and are only meaningful relative to each other.
+    """
+    features = speaker_features(diarized_segments)
+    return {
+        speaker: (
+            2.0 * f["talk_share"]
+            + 1.5 * (1.0 - f["question_ratio"])
+            + 1.0 * f["turn_share"]
+            - 0.5 * f["speaks_first"]
+        )
+        for speaker, f in features.items()
+    }
+
+def _ask_gemini_for_candidate(diarized_segments, speakers):
+    """Gemini's pick among the diarized speakers, or None if it fails or names an unknown label"""
     try:
         conversation_text = ""
         for segment in diarized_segments[:10]:
@@ -82,12 +442,38 @@ def determine_candidate_speaker(diarized_segments):
         """
         
         response = model.generate_content(prompt)
-        candidate_speaker = response.text.strip()
-        
-        return candidate_speaker
+        for label in re.findall(r"Speaker_\d+", response.text):
+            if label in speakers:
+                return label
+        return None
     
-    except Exception:
-        return "Speaker_1"
+    except Exception as e:
+        print(f"Gemini candidate detection failed: {str(e)}")
+        return None
+
+def determine_candidate_speaker(diarized_segments, min_margin=CANDIDATE_MIN_MARGIN):
+    """Determine which speaker is the candidate/interviewee
+
+    The local scores decide when the best speaker leads the runner-up by at least min_margin;
+    otherwise Gemini is asked. The result is one of the diarized speaker labels, or None when
+    there are no segments.
+    """
+    scores = score_candidate_speakers(diarized_segments)
+    if not scores:
+        print("No speech segments, so there is no candidate speaker")
+        return None
+
+    ranked = sorted(scores, key=scores.get, reverse=True)
+    best_speaker = ranked[0]
+    if len(ranked) == 1:
+        return best_speaker
+    margin = scores[best_speaker] - scores[ranked[1]]
+    if margin >= min_margin:
+        print(f"Candidate speaker from conversation features: {best_speaker} (margin {margin:.2f} over {ranked[1]})")
+        return best_speaker
+
+    print(f"Speakers score too close to call locally (margin {margin:.2f}), asking Gemini...")
+    return _ask_gemini_for_candidate(diarized_segments, set(scores)) or best_speaker
 
 def get_candidate_segments(diarized_segments, candidate_speaker="Speaker_1"):
     """Extract only candidate segments"""
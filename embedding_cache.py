@@ -0,0 +1,151 @@
+import os
+import re
+import sqlite3
+import threading
+from collections import OrderedDict
+import numpy as np
+from config import EMBEDDING_MODEL, EMBEDDING_CACHE_PATH, EMBEDDING_CACHE_SIZE, CACHE_DB_TIMEOUT
+
+def normalize_phrase(phrase):
+    """Lowercase, trim surrounding punctuation and collapse whitespace"""
+    phrase = re.sub(r"\s+", " ", phrase.lower()).strip()
+    return phrase.strip(".,!?;:\"'()[]{}").strip()
+
+class PhraseEmbeddingCache:
+    """Phrase embeddings keyed by (model name, normalized phrase)
+
+    Recently used vectors live in an in-memory LRU; every vector is also written to a
+    SQLite store so the cache survives between runs. Pass path=None for memory only.
+    A store that stays locked by other processes is treated as a cache miss.
+    """
+
+    def __init__(self, model_name=EMBEDDING_MODEL, path=EMBEDDING_CACHE_PATH, max_items=EMBEDDING_CACHE_SIZE):
+        self.model_name = model_name
+        self.path = path
+        self.max_items = max_items
+        self._memory = OrderedDict()
+        self._lock = threading.Lock()
+        self._stats = {"memory_hits": 0, "disk_hits": 0, "misses": 0}
+        self._db = None
+        if path:
+            os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+            self._db = sqlite3.connect(path, timeout=CACHE_DB_TIMEOUT, check_same_thread=False)
+            # WAL lets batch workers read while another one writes
+            self._db.execute("PRAGMA journal_mode=WAL")
+            self._db.execute(
+                "CREATE TABLE IF NOT EXISTS embeddings ("
+                "model TEXT NOT NULL, phrase TEXT NOT NULL, vector BLOB NOT NULL, "
+                "PRIMARY KEY (model, phrase))"
+            )
+            self._db.commit()
+
+    def _remember(self, phrase, vector):
+        self._memory[phrase] = vector
+        self._memory.move_to_end(phrase)
+        while len(self._memory) > self.max_items:
+            self._memory.popitem(last=False)
+
+    def _load_from_disk(self, phrases):
+        found = {}
+        if self._db is None or not phrases:
+            return found
+        try:
+            # Stay under SQLite's bound-parameter limit
+            for start in range(0, len(phrases), 500):
+                batch = phrases[start:start + 500]
+                placeholders = ",".join("?" * len(batch))
+                rows = self._db.execute(
+                    f"SELECT phrase, vector FROM embeddings WHERE model = ? AND phrase IN ({placeholders})",
+                    [self.model_name, *batch],
+                )
+                for phrase, blob in rows:
+                    found[phrase] = np.frombuffer(blob, dtype=np.float32)
+        except sqlite3.OperationalError as e:
+            print(f"Phrase cache read failed, encoding instead: {e}")
+        return found
+
+    def _store_on_disk(self, vectors):
+        if self._db is None or not vectors:
+            return
+        try:
+            self._db.executemany(
+                "INSERT OR REPLACE INTO embeddings (model, phrase, vector) VALUES (?, ?, ?)",
+                [(self.model_name, phrase, vector.astype(np.float32).tobytes()) for phrase, vector in vectors.items()],
+            )
+            self._db.commit()
+        except sqlite3.OperationalError as e:
+            # The vectors stay in memory; only the on-disk copy is skipped
+            self._db.rollback()
+            print(f"Phrase cache write failed, skipping: {e}")
+
+    def encode(self, phrases, encoder, batch_size=256):
+        """Embeddings for phrases (normalized first); only cache misses go through encoder.encode"""
+        keys = [normalize_phrase(phrase) for phrase in phrases]
+        unique_keys = list(dict.fromkeys(keys))
+
+        with self._lock:
+            vectors = {}
+            pending = []
+            for key in unique_keys:
+                if key in self._memory:
+                    self._memory.move_to_end(key)
+                    vectors[key] = self._memory[key]
+                    self._stats["memory_hits"] += 1
+                else:
+                    pending.append(key)
+
+            from_disk = self._load_from_disk(pending)
+            self._stats["disk_hits"] += len(from_disk)
+            for key, vector in from_disk.items():
+                vectors[key] = vector
+                self._remember(key, vector)
+
+            misses = [key for key in pending if key not in from_disk]
+            self._stats["misses"] += len(misses)
+
+        if misses:
+            encoded = encoder.encode(misses, batch_size=batch_size, convert_to_numpy=True)
+            new_vectors = {key: np.asarray(vector, dtype=np.float32) for key, vector in zip(misses, encoded)}
+            with self._lock:
+                for key, vector in new_vectors.items():
+                    vectors[key] = vector
+                    self._remember(key, vector)
+                self._store_on_disk(new_vectors)
+
+        if not keys:
+            return np.zeros((0, encoder.get_sentence_embedding_dimension()), dtype=np.float32)
+        return np.vstack([vectors[key] for key in keys])
+
+    def stats(self):
+        """Hit counts and hit rate since this cache was created"""
+        with self._lock:
+            stats = dict(self._stats)
+            stats["memory_items"] = len(self._memory)
+        lookups = stats["memory_hits"] + stats["disk_hits"] + stats["misses"]
+        stats["hit_rate"] = (stats["memory_hits"] + stats["disk_hits"]) / lookups if lookups else 0.0
+        return stats
+
+    def clear(self):
+        """Drop all cached vectors for this model, in memory and on disk"""
+        with self._lock:
+            self._memory.clear()
+            if self._db is not None:
+                self._db.execute("DELETE FROM embeddings WHERE model = ?", (self.model_name,))
+                self._db.commit()
+
+_phrase_cache = None
+_phrase_cache_lock = threading.Lock()
+
+def phrase_cache_stats():
+    """Stats of the process-wide phrase cache, or None if nothing has used it yet"""
+    with _phrase_cache_lock:
+        cache = _phrase_cache
+    return cache.stats() if cache is not None else None
+
+def get_phrase_cache():
+    """Process-wide phrase embedding cache for the configured embedding model"""
+    global _phrase_cache
+    with _phrase_cache_lock:
+        if _phrase_cache is None:
+            _phrase_cache = PhraseEmbeddingCache()
+        return _phrase_cache
@@ -0,0 +1,105 @@
+import cProfile
+import json
+import os
+import re
+import sys
+import threading
+import time
+from datetime import datetime
+
+def current_rss_mb():
+    """Resident set size of this process in MB"""
+    try:
+        with open("/proc/self/statm") as f:
+            resident_pages = int(f.read().split()[1])
+        return resident_pages * os.sysconf("SC_PAGE_SIZE") / (1024 * 1024)
+    except (OSError, ValueError, IndexError):
+        import resource
+        peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+        # ru_maxrss is reported in bytes on macOS and kilobytes on Linux
+        return peak / (1024 * 1024) if sys.platform == "darwin" else peak / 1024
+
+class _RssSampler:
+    """Polls process RSS in a background thread and keeps the maximum seen"""
+
+    def __init__(self, interval=0.05):
+        self.interval = interval
+        self.peak = current_rss_mb()
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._run, daemon=True)
+
+    def _run(self):
+        while not self._stop.wait(self.interval):
+            self.peak = max(self.peak, current_rss_mb())
+
+    def __enter__(self):
+        self._thread.start()
+        return self
+
+    def __exit__(self, *exc):
+        self._stop.set()
+        self._thread.join()
+        self.peak = max(self.peak, current_rss_mb())
+
+def child_cpu_seconds():
+    """User plus system CPU time of child processes that have exited and been waited for"""
+    try:
+        import resource
+    except ImportError:
+        return 0.0
+    usage = resource.getrusage(resource.RUSAGE_CHILDREN)
+    return usage.ru_utime + usage.ru_stime
+
+def _profile_path(profile_dir, name):
+    safe_name = re.sub(r"[^\w.-]", "_", name)
+    return os.path.join(profile_dir, f"{datetime.now().strftime('%Y%m%d_%H%M%S')}_{os.getpid()}_{safe_name}.prof")
+
+def measure_call(name, func, kwargs, profile_dir=None):
+    """Call func(**kwargs) and return (result, metrics)
+
+    metrics holds wall time, CPU time and the peak process RSS observed while the call ran.
+    process_cpu_seconds (every thread, including torch's intra-op threads), child_cpu_seconds
+    (child processes that exited during the call, e.g. a chunked-transcription pool) and RSS
+    are process-wide, so stages that overlap share them; thread_cpu_seconds covers only the
+    calling thread. With profile_dir set, a cProfile dump is written per call.
+    """
+    profiler = None
+    if profile_dir:
+        os.makedirs(profile_dir, exist_ok=True)
+        profiler = cProfile.Profile()
+        try:
+            profiler.enable()
+        except ValueError:
+            # Only one profiler can be active at a time on newer Pythons
+            print(f"Profiler busy, skipping profile for stage '{name}'")
+            profiler = None
+
+    rss_start = current_rss_mb()
+    wall_start = time.perf_counter()
+    cpu_start = time.process_time()
+    child_cpu_start = child_cpu_seconds()
+    thread_cpu_start = time.thread_time()
+    try:
+        with _RssSampler() as sampler:
+            result = func(**kwargs)
+    finally:
+        if profiler is not None:
+            profiler.disable()
+            profiler.dump_stats(_profile_path(profile_dir, name))
+
+    metrics = {
+        "wall_seconds": time.perf_counter() - wall_start,
+        "process_cpu_seconds": time.process_time() - cpu_start,
+        "child_cpu_seconds": child_cpu_seconds() - child_cpu_start,
+        "thread_cpu_seconds": time.thread_time() - thread_cpu_start,
+        "rss_start_mb": rss_start,
+        "peak_rss_mb": sampler.peak,
+    }
+    return result, metrics
+
+def write_metrics_log(metrics, log_path, extra=None):
+    """Append one JSON line with the run's metrics"""
+    record = {"timestamp": datetime.now().isoformat(timespec="seconds"), **(extra or {}), "metrics": metrics}
+    os.makedirs(os.path.dirname(log_path) or ".", exist_ok=True)
+    with open(log_path, "a", encoding="utf-8") as f:
+        f.write(json.dumps(record, default=str) + "\n")
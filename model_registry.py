@@ -0,0 +1,131 @@
+import threading
+import time
+from instrumentation import current_rss_mb
+from config import WHISPER_MODEL_SIZE, PREVIEW_WHISPER_MODEL_SIZE, TRANSCRIPTION_BACKEND, SENTIMENT_MODEL, EMBEDDING_MODEL, SPACY_MODEL
+
+_models = {}
+_stats = {}
+_loaders = {}
+_lock = threading.RLock()
+_model_locks = {}
+_not_warmed = set()
+
+def register_model(name, loader, warm=True):
+    """Register a zero-argument loader for a model name
+
+    warm=False leaves the model out of warm_models() unless it is named explicitly.
+    """
+    with _lock:
+        _loaders[name] = loader
+        if warm:
+            _not_warmed.discard(name)
+        else:
+            _not_warmed.add(name)
+
+def get_model(name):
+    """Return the shared instance of a model, loading it on first use"""
+    if name in _models:
+        return _models[name]
+
+    with _lock:
+        if name not in _loaders:
+            raise KeyError(f"Unknown model: {name}. Registered: {sorted(_loaders)}")
+        model_lock = _model_locks.setdefault(name, threading.Lock())
+
+    # Per-model lock so two different models can load concurrently
+    with model_lock:
+        if name in _models:
+            return _models[name]
+
+        print(f"Loading model '{name}'...")
+        rss_before = current_rss_mb()
+        start = time.perf_counter()
+        model = _loaders[name]()
+        load_time = time.perf_counter() - start
+        rss_after = current_rss_mb()
+
+        _stats[name] = {
+            "load_time": load_time,
+            "rss_delta_mb": max(rss_after - rss_before, 0.0),
+            "rss_after_mb": rss_after,
+        }
+        _models[name] = model
+        print(f"Model '{name}' loaded in {load_time:.2f}s (+{_stats[name]['rss_delta_mb']:.0f} MB)")
+        return model
+
+def is_loaded(name):
+    """Check whether a model is already resident in this process"""
+    return name in _models
+
+def warm_models(names=None):
+    """Load the given models (all registered models by default) ahead of time"""
+    if names is None:
+        names = [name for name in _loaders if name not in _not_warmed]
+    for name in names:
+        get_model(name)
+    return get_model_stats()
+
+def get_model_stats():
+    """Load time and resident memory for every model loaded so far"""
+    return {name: dict(stats) for name, stats in _stats.items()}
+
+def unload_model(name):
+    """Drop a model instance so the next get_model call reloads it"""
+    with _lock:
+        _models.pop(name, None)
+        _stats.pop(name, None)
+
+# Loaders - heavy libraries are imported here so importing this module stays cheap
+
+def _load_whisper():
+    from transcription_backends import load_transcription_backend
+    return load_transcription_backend(TRANSCRIPTION_BACKEND, WHISPER_MODEL_SIZE)
+
+def _load_whisper_preview():
+    from transcription_backends import load_transcription_backend
+    return load_transcription_backend(TRANSCRIPTION_BACKEND, PREVIEW_WHISPER_MODEL_SIZE)
+
+def _load_sentiment():
+    from transformers import AutoTokenizer, AutoModelForSequenceClassification
+    sent_model = AutoModelForSequenceClassification.from_pretrained(SENTIMENT_MODEL)
+    sent_model.eval()
+    tokenizer = AutoTokenizer.from_pretrained(SENTIMENT_MODEL)
+    return sent_model, tokenizer
+
+def _load_spacy():
+    import spacy
+    # Only doc.ents is used, so skip loading the tagger, parser and lemmatizer entirely
+    nlp = spacy.load(SPACY_MODEL, exclude=["tagger", "parser", "attribute_ruler", "lemmatizer", "senter"])
+    if "tok2vec" in nlp.pipe_names and "ner" not in getattr(nlp.get_pipe("tok2vec"), "listening_components", []):
+        nlp.disable_pipe("tok2vec")
+    return nlp
+
+def _load_sentence_embedder():
+    from sentence_transformers import SentenceTransformer
+    return SentenceTransformer(EMBEDDING_MODEL)
+
+def _load_skill_ontology():
+    from skill_ontology import load_ontology
+    return load_ontology()
+
+def _load_skill_index():
+    from skill_ontology import load_skill_index
+    return load_skill_index(get_model("sentence_embedder"), get_model("skill_ontology"))
+
+def _load_skill_matcher():
+    from skill_ontology import build_ontology_matcher
+    return build_ontology_matcher(get_model("skill_ontology"))
+
+def _load_voice_encoder():
+    from resemblyzer import VoiceEncoder
+    return VoiceEncoder()
+
+register_model("whisper", _load_whisper)
+register_model("whisper_preview", _load_whisper_preview, warm=False)
+register_model("sentiment", _load_sentiment)
+register_model("spacy", _load_spacy)
+register_model("sentence_embedder", _load_sentence_embedder)
+register_model("skill_ontology", _load_skill_ontology)
+register_model("skill_index", _load_skill_index)
+register_model("skill_matcher", _load_skill_matcher)
+register_model("voice_encoder", _load_voice_encoder)
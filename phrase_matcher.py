@@ -0,0 +1,68 @@
+from collections import deque
+
+def _lower_same_length(text):
+    """Lowercase without changing the string length, so match spans index the original text"""
+    return "".join(c.lower() if len(c.lower()) == 1 else c for c in text)
+
+class PhraseMatcher:
+    """Aho-Corasick automaton that finds every known phrase in one linear pass
+
+    Matching is case-insensitive and only whole-word hits are reported.
+    """
+
+    def __init__(self, phrases):
+        # phrases: iterable of (surface form, payload)
+        self._goto = [{}]
+        self._fail = [0]
+        self._outputs = [[]]
+        self._patterns = []
+
+        for surface, payload in phrases:
+            key = _lower_same_length(surface.strip())
+            if not key:
+                continue
+            node = 0
+            for char in key:
+                if char not in self._goto[node]:
+                    self._goto.append({})
+                    self._fail.append(0)
+                    self._outputs.append([])
+                    self._goto[node][char] = len(self._goto) - 1
+                node = self._goto[node][char]
+            self._outputs[node].append(len(self._patterns))
+            self._patterns.append((len(key), payload))
+
+        self._build_failure_links()
+
+    def _build_failure_links(self):
+        queue = deque(self._goto[0].values())
+        while queue:
+            node = queue.popleft()
+            for char, child in self._goto[node].items():
+                queue.append(child)
+                if node:
+                    fallback = self._fail[node]
+                    while fallback and char not in self._goto[fallback]:
+                        fallback = self._fail[fallback]
+                    self._fail[child] = self._goto[fallback].get(char, 0)
+                self._outputs[child] = self._outputs[child] + self._outputs[self._fail[child]]
+
+    def __len__(self):
+        return len(self._patterns)
+
+    def find_all(self, text):
+        """Return (start, end, payload) for every whole-word occurrence, in text order"""
+        lowered = _lower_same_length(text)
+        hits = []
+        node = 0
+        for position, char in enumerate(lowered):
+            while node and char not in self._goto[node]:
+                node = self._fail[node]
+            node = self._goto[node].get(char, 0)
+            for pattern_id in self._outputs[node]:
+                length, payload = self._patterns[pattern_id]
+                start, end = position - length + 1, position + 1
+                if (start == 0 or not text[start - 1].isalnum()) and (end == len(text) or not text[end].isalnum()):
+                    hits.append((start, end, payload))
+        hits.sort(key=lambda hit: (hit[0], -hit[1]))
+        return hits
@@ -1,82 +1,495 @@
-from audio_ingest import load_and_preprocess_audio
-from transcribe_whisper import transcribe_audio_from_array
-from diarize import diarize_whisper_segments_from_array, get_candidate_transcript, get_candidate_segments, determine_candidate_speaker
-from clean_transcript import clean_transcript_segments, format_transcript_for_display
-from sentiment import analyze_sentiment, analyze_segment_sentiments
-from skills_extractor import extract_candidate_info
+from audio_ingest import load_and_preprocess_audio, remove_silence, remap_segments
+from transcribe_whisper import transcribe_audio_from_array, transcribe_audio_chunked, stream_transcription
+from diarize import (
+    diarize_whisper_segments_from_array, get_candidate_transcript, get_candidate_segments, determine_candidate_speaker,
+    compute_window_embeddings, pool_segment_embeddings, get_segment_embedding_from_array, OnlineSpeakerClustering,
+    diarize_with_windows,
+)
+from clean_transcript import clean_text, clean_transcript_segments, format_transcript_for_display
+from sentiment import analyze_segment_sentiments, analyze_sentiments_batch, aggregate_sentiment
+from skills_extractor import extract_candidate_info, extract_skills_quick
 from summarize_and_decide import generate_evaluation
+from stage_scheduler import Stage, run_stages, format_timings
+from model_registry import get_model, get_model_stats
+from embedding_cache import phrase_cache_stats
+from skill_ontology import ontology_hash
+from instrumentation import current_rss_mb, write_metrics_log, measure_call
+from artifact_cache import get_artifact_cache, hash_file
+from concurrent.futures import ThreadPoolExecutor
+from config import (
+    CHUNKED_TRANSCRIPTION, TRANSCRIBE_CHUNK_SECONDS, PIPELINE_MODE, METRICS_LOG_PATH, PROFILE_DIR, ARTIFACT_CACHE_ENABLED,
+    SAMPLE_RATE, WHISPER_MODEL_SIZE, TRANSCRIBE_SPLIT_SEARCH_SECONDS, DIARIZATION_EMBEDDING_MODE, EMBEDDING_WINDOW_RATE,
+    DIARIZATION_MAX_DISTANCE_SEGMENTS, DIARIZATION_MAX_LINKAGE_SEGMENTS, SENTIMENT_MODEL, SENTIMENT_WINDOW_OVERLAP, EMBEDDING_MODEL, SPACY_MODEL,
+    SKILL_MATCH_THRESHOLD, GEMINI_MODEL, VAD_ENABLED, VAD_AGGRESSIVENESS, VAD_FRAME_MS,
+    VAD_MIN_SPEECH_SECONDS, VAD_MIN_SILENCE_SECONDS, VAD_PADDING_SECONDS, TRANSCRIPTION_BACKEND, FASTER_WHISPER_COMPUTE_TYPE,
+    PREVIEW_WHISPER_MODEL_SIZE, STREAM_SENTIMENT_BATCH_SIZE, TRANSCRIPTION_LANGUAGE, LANGUAGE_DETECT_SECONDS,
+    DECODING_PROFILES, DECODING_PROFILE, PREVIEW_DECODING_PROFILE, WORD_TIMESTAMPS, CHANGE_POINT_DETECTION,
+    CHANGE_POINT_THRESHOLD, CHANGE_POINT_MIN_WINDOWS, CHANGE_POINT_CONTEXT_WINDOWS, CHANGE_POINT_MAX_CHANGES,
+    FULL_ANALYSIS_WORKERS, CANDIDATE_MIN_MARGIN, PREVIEW_MAX_SECONDS,
+)
 
-def run_full_pipeline(audio_path, candidate_speaker=None):
-    """Run the complete interview analysis pipeline"""
-    
-    print("Starting Interview Analysis Pipeline...")
-    
-    # Audio ingestion
+# Stages whose outputs the preview and the full pipeline share
+SHARED_AUDIO_STAGES = ("audio", "speech")
+
+# Stages that streaming mode replaces with stream_segment_stages
+STREAMED_STAGES = ("transcription", "diarization", "cleaning", "segment_sentiments")
+
+# (ontology object, its content hash) - hashing a large ontology on every run is wasteful
+_ontology_key = None
+
+# Full analyses started by run_two_pass run here; further ones queue until a worker is free
+_background = ThreadPoolExecutor(max_workers=FULL_ANALYSIS_WORKERS, thread_name_prefix="full-analysis")
+
+# Stage functions - each receives the outputs of the stages it depends on
+
+def stage_audio(audio_path):
     print("Loading audio...")
-    audio_array, sample_rate = load_and_preprocess_audio(audio_path)
-    
-    # Transcription
+    return load_and_preprocess_audio(audio_path)
+
+def stage_speech(audio):
+    print("Detecting speech...")
+    audio_array, sample_rate = audio
+    return remove_silence(audio_array, sample_rate, enabled=VAD_ENABLED)
+
+def stage_transcription(speech):
+    """Transcribe the speech-only audio; segment times are mapped back to the original recording"""
     print("Transcribing audio...")
-    whisper_segments, full_transcript = transcribe_audio_from_array(audio_array, sample_rate)
-    
-    # Diarization
+    audio_array, sample_rate = speech["audio"], speech["sample_rate"]
+    if CHUNKED_TRANSCRIPTION and len(audio_array) / sample_rate > TRANSCRIBE_CHUNK_SECONDS:
+        segments, full_text = transcribe_audio_chunked(audio_array, sample_rate)
+    else:
+        segments, full_text = transcribe_audio_from_array(audio_array, sample_rate)
+    return remap_segments(segments, speech["offset_map"], sample_rate), full_text
+
+def _restore_original_times(diarized, compact_segments, whisper_segments, offset_map, sample_rate):
+    """Move diarized segments back to the original timeline
+
+    Boundaries that are Whisper's own keep their original times exactly; boundaries added by
+    speaker-change splits are mapped through the offset map.
+    """
+    starts = {seg["start"]: original["start"] for seg, original in zip(compact_segments, whisper_segments)}
+    ends = {seg["end"]: original["end"] for seg, original in zip(compact_segments, whisper_segments)}
+    mapped = remap_segments(diarized, offset_map, sample_rate)
+    return [{**seg, "start": starts.get(seg["start"], moved["start"]), "end": ends.get(seg["end"], moved["end"])}
+            for seg, moved in zip(diarized, mapped)]
+
+def stage_diarization(speech, transcription):
     print("Speaker diarization...")
-    diarized_segments = diarize_whisper_segments_from_array(audio_array, sample_rate, whisper_segments)
-    
-    # Determine candidate speaker
-    if candidate_speaker is None:
-        print("Determining candidate speaker using AI...")
-        candidate_speaker = determine_candidate_speaker(diarized_segments)
-        print(f"Detected candidate speaker: {candidate_speaker}")
-    
-    # Transcript cleaning
+    audio_array, sample_rate, offset_map = speech["audio"], speech["sample_rate"], speech["offset_map"]
+    whisper_segments, _ = transcription
+    # Embeddings come from the speech-only audio, so look segments up on its timeline
+    compact_segments = remap_segments(whisper_segments, offset_map, sample_rate, to_original=False)
+    diarized = diarize_whisper_segments_from_array(audio_array, sample_rate, compact_segments)
+    return _restore_original_times(diarized, compact_segments, whisper_segments, offset_map, sample_rate)
+
+def stage_candidate_speaker(diarization, candidate_speaker_override):
+    if candidate_speaker_override is not None:
+        return candidate_speaker_override
+    print("Determining candidate speaker using AI...")
+    candidate_speaker = determine_candidate_speaker(diarization)
+    print(f"Detected candidate speaker: {candidate_speaker}")
+    return candidate_speaker
+
+def stage_cleaning(diarization):
     print("Cleaning transcript...")
-    cleaned_segments = clean_transcript_segments(diarized_segments)
-    
-    # Get candidate transcript
+    return clean_transcript_segments(diarization)
+
+def stage_segment_sentiments(cleaning):
+    print("Analyzing segment sentiment...")
+    return analyze_segment_sentiments(cleaning)
+
+def stage_candidate(cleaning, candidate_speaker):
     print("Extracting candidate speech...")
-    candidate_segments = get_candidate_segments(cleaned_segments, candidate_speaker)
-    candidate_transcript = get_candidate_transcript(cleaned_segments, candidate_speaker)
-    
-    # Sentiment analysis
-    print("Analyzing sentiment...")
-    sentiment = analyze_sentiment(candidate_transcript)
-    segment_sentiments = analyze_segment_sentiments(cleaned_segments)
-    
-    # Skills extraction
+    candidate_segments = get_candidate_segments(cleaning, candidate_speaker)
+    candidate_transcript = get_candidate_transcript(cleaning, candidate_speaker)
+    return candidate_segments, candidate_transcript
+
+def stage_sentiment(segment_sentiments, candidate_speaker):
+    return aggregate_sentiment([seg for seg in segment_sentiments if seg.get("speaker") == candidate_speaker])
+
+def stage_skills(candidate):
     print("Extracting skills...")
-    skills_info = extract_candidate_info(candidate_transcript)
-    
-    # AI Evaluation
+    candidate_segments, candidate_transcript = candidate
+    return extract_candidate_info(candidate_transcript, candidate_segments)
+
+def stage_evaluation(cleaning, sentiment, skills):
     print("Generating AI evaluation...")
-    formatted_transcript = format_transcript_for_display(cleaned_segments)
-    evaluation = generate_evaluation(
-        formatted_transcript,
-        sentiment,
-        skills_info,
-        cleaned_segments
-    )
-    
-    # Compile final results
-    results = {
+    formatted_transcript = format_transcript_for_display(cleaning)
+    return generate_evaluation(formatted_transcript, sentiment, skills, cleaning)
+
+# Preview stages - a tiny Whisper model and exact skill matching, no diarization or Gemini
+
+def stage_preview_transcription(speech):
+    """Draft transcript of the first PREVIEW_MAX_SECONDS of speech"""
+    print("Transcribing draft preview...")
+    leading = speech["audio"][:int(PREVIEW_MAX_SECONDS * speech["sample_rate"])]
+    segments, full_text = transcribe_audio_from_array(leading, speech["sample_rate"], model_name="whisper_preview",
+                                                      profile=PREVIEW_DECODING_PROFILE, word_timestamps=False)
+    return remap_segments(segments, speech["offset_map"], speech["sample_rate"]), full_text
+
+def stage_preview_cleaning(preview_transcription):
+    segments, _ = preview_transcription
+    # Speakers are unknown until the full pass diarizes
+    return clean_transcript_segments([{**seg, "speaker": "Draft"} for seg in segments])
+
+def stage_preview_skills(preview_cleaning):
+    text = " ".join(seg["text"] for seg in preview_cleaning)
+    return extract_skills_quick(text, preview_cleaning)
+
+# Streaming mode - per-segment work runs while Whisper is still decoding
+
+def stream_segment_stages(speech, on_segment=None):
+    """Transcription, diarization, cleaning and segment sentiment, consumed segment by segment
+
+    Each segment is embedded, given a provisional speaker, cleaned and queued for sentiment as
+    soon as Whisper produces it; on_segment receives every cleaned segment with its provisional
+    speaker. Once transcription ends, speakers are re-labeled (and segments split at speaker
+    changes) over all segments, so the returned outputs (keyed by STREAMED_STAGES) match the
+    batch stages.
+    """
+    print("Streaming transcription, diarization, cleaning and sentiment...")
+    audio_array, sample_rate, offset_map = speech["audio"], speech["sample_rate"], speech["offset_map"]
+    clustering = OnlineSpeakerClustering()
+    compact_segments = []
+    whisper_segments = []
+    sentiment_batches = []
+    pending = []
+
+    # One helper runs the whole-file encoder pass, the other scores sentiment batches meanwhile
+    with ThreadPoolExecutor(max_workers=2, thread_name_prefix="streaming") as helper:
+        windows = None
+        if DIARIZATION_EMBEDDING_MODE == "windowed":
+            windows = helper.submit(compute_window_embeddings, audio_array, sample_rate)
+
+        for segment in stream_transcription(audio_array, sample_rate):
+            # Embeddings are looked up on the speech-only timeline the segment comes in. Waiting
+            # for the encoder pass would hold back the first segments until it covers the whole
+            # file, so segments decoded before then are embedded on their own
+            if windows is not None and windows.done():
+                embedding = pool_segment_embeddings(*windows.result(), [segment])[0]
+            else:
+                embedding = get_segment_embedding_from_array(audio_array, sample_rate, segment["start"], segment["end"])
+            speaker = clustering.add(embedding)
+
+            original = remap_segments([segment], offset_map, sample_rate)[0]
+            compact_segments.append(segment)
+            whisper_segments.append(original)
+            text = clean_text(original.get("text", ""))
+            if not text:
+                continue
+            pending.append(text)
+            if len(pending) >= STREAM_SENTIMENT_BATCH_SIZE:
+                sentiment_batches.append((pending, helper.submit(analyze_sentiments_batch, pending)))
+                pending = []
+            if on_segment is not None:
+                on_segment({"speaker": f"Speaker_{speaker+1}", "start": original["start"], "end": original["end"], "text": text})
+
+        if pending:
+            sentiment_batches.append((pending, helper.submit(analyze_sentiments_batch, pending)))
+        # Sentiment depends only on the text, so scores carry over to the re-labeled segments
+        sentiments = {}
+        for texts, batch in sentiment_batches:
+            sentiments.update(zip(texts, batch.result()))
+
+    if windows is not None:
+        diarized = diarize_with_windows(*windows.result(), compact_segments)
+        diarized = _restore_original_times(diarized, compact_segments, whisper_segments, offset_map, sample_rate)
+    else:
+        labels = clustering.finalize()
+        diarized = [
+            {"speaker": f"Speaker_{spk+1}", "start": seg["start"], "end": seg["end"], "text": seg["text"]}
+            for seg, spk in zip(whisper_segments, labels)
+        ]
+    cleaned = clean_transcript_segments(diarized)
+    # Pieces of segments split at speaker changes have new text to score
+    unscored = list(dict.fromkeys(seg["text"] for seg in cleaned if seg["text"] not in sentiments))
+    sentiments.update(zip(unscored, analyze_sentiments_batch(unscored)))
+    print(f"Streamed {len(whisper_segments)} segments")
+    return {
+        "transcription": (whisper_segments, "".join(seg["text"] for seg in whisper_segments)),
+        "diarization": diarized,
+        "cleaning": cleaned,
+        "segment_sentiments": [{**seg, "sentiment": sentiments[seg["text"]]} for seg in cleaned],
+    }
+
+def evaluation_succeeded(evaluation):
+    """generate_evaluation reports Gemini failures as text - those must not be cached"""
+    return not evaluation.startswith("Error generating evaluation")
+
+def _ontology_version():
+    """Content hash of the loaded skill ontology, so edits to the file invalidate cached skills"""
+    global _ontology_key
+    ontology = get_model("skill_ontology")
+    if _ontology_key is None or _ontology_key[0] is not ontology:
+        _ontology_key = (ontology, ontology_hash(ontology))
+    return _ontology_key[1]
+
+def build_pipeline_stages():
+    """Dependency graph of the full analysis pipeline"""
+    return [
+        # Decoding into a memory map is cheaper than unpickling the samples, and keeps downstream views zero-copy
+        Stage("audio", stage_audio, ["audio_path"], config={"sample_rate": SAMPLE_RATE}, cacheable=False),
+        Stage("speech", stage_speech, ["audio"], config={
+            "enabled": VAD_ENABLED, "aggressiveness": VAD_AGGRESSIVENESS, "frame_ms": VAD_FRAME_MS,
+            "min_speech_seconds": VAD_MIN_SPEECH_SECONDS, "min_silence_seconds": VAD_MIN_SILENCE_SECONDS,
+            "padding_seconds": VAD_PADDING_SECONDS,
+        }, cacheable=False),
+        Stage("transcription", stage_transcription, ["speech"], config={
+            "model": WHISPER_MODEL_SIZE, "backend": TRANSCRIPTION_BACKEND,
+            "compute_type": FASTER_WHISPER_COMPUTE_TYPE if TRANSCRIPTION_BACKEND == "faster-whisper" else None,
+            "chunked": CHUNKED_TRANSCRIPTION,
+            "chunk_seconds": TRANSCRIBE_CHUNK_SECONDS, "split_search_seconds": TRANSCRIBE_SPLIT_SEARCH_SECONDS,
+            "language": TRANSCRIPTION_LANGUAGE, "language_detect_seconds": LANGUAGE_DETECT_SECONDS,
+            "decoding": DECODING_PROFILES[DECODING_PROFILE], "word_timestamps": WORD_TIMESTAMPS,
+        }),
+        Stage("diarization", stage_diarization, ["speech", "transcription"], config={
+            "embedding_mode": DIARIZATION_EMBEDDING_MODE, "window_rate": EMBEDDING_WINDOW_RATE,
+            "max_distance_segments": DIARIZATION_MAX_DISTANCE_SEGMENTS, "max_linkage_segments": DIARIZATION_MAX_LINKAGE_SEGMENTS,
+            "change_points": CHANGE_POINT_DETECTION, "change_threshold": CHANGE_POINT_THRESHOLD,
+            "change_min_windows": CHANGE_POINT_MIN_WINDOWS, "change_context_windows": CHANGE_POINT_CONTEXT_WINDOWS,
+            "max_changes": CHANGE_POINT_MAX_CHANGES,
+        }),
+        Stage("candidate_speaker", stage_candidate_speaker, ["diarization", "candidate_speaker_override"],
+              resource="network", config={"model": GEMINI_MODEL, "min_margin": CANDIDATE_MIN_MARGIN}),
+        Stage("cleaning", stage_cleaning, ["diarization"]),
+        Stage("segment_sentiments", stage_segment_sentiments, ["cleaning"], config={
+            "model": SENTIMENT_MODEL, "window_overlap": SENTIMENT_WINDOW_OVERLAP,
+        }),
+        Stage("candidate", stage_candidate, ["cleaning", "candidate_speaker"]),
+        Stage("sentiment", stage_sentiment, ["segment_sentiments", "candidate_speaker"]),
+        Stage("skills", stage_skills, ["candidate"], config={
+            "embedding_model": EMBEDDING_MODEL, "spacy_model": SPACY_MODEL,
+            "ontology": _ontology_version(), "threshold": SKILL_MATCH_THRESHOLD,
+        }),
+        Stage("evaluation", stage_evaluation, ["cleaning", "sentiment", "skills"], resource="network",
+              config={"model": GEMINI_MODEL}, cache_check=evaluation_succeeded),
+    ]
+
+def build_preview_stages():
+    """Draft transcript and skills on top of the shared audio stages"""
+    shared = [stage for stage in build_pipeline_stages() if stage.name in SHARED_AUDIO_STAGES]
+    return shared + [
+        Stage("preview_transcription", stage_preview_transcription, ["speech"], config={
+            "model": PREVIEW_WHISPER_MODEL_SIZE, "backend": TRANSCRIPTION_BACKEND, "max_seconds": PREVIEW_MAX_SECONDS,
+            "language": TRANSCRIPTION_LANGUAGE, "decoding": DECODING_PROFILES[PREVIEW_DECODING_PROFILE],
+        }),
+        Stage("preview_cleaning", stage_preview_cleaning, ["preview_transcription"]),
+        Stage("preview_skills", stage_preview_skills, ["preview_cleaning"], config={"ontology": _ontology_version()}),
+    ]
+
+def compile_results(artifacts):
+    """Assemble the results dict from stage outputs"""
+    audio_array, sample_rate = artifacts["audio"]
+    speech = artifacts["speech"]
+    _, full_transcript = artifacts["transcription"]
+    candidate_segments, candidate_transcript = artifacts["candidate"]
+    return {
         'audio_metadata': {
             'duration': len(audio_array)/sample_rate,
-            'sample_rate': sample_rate
+            'sample_rate': sample_rate,
+            'speech_seconds': speech['speech_seconds'],
+            'skipped_fraction': speech['skipped_fraction'],
         },
         'full_transcript': full_transcript,
-        'diarized_segments': cleaned_segments,
+        'diarized_segments': artifacts["cleaning"],
         'candidate_segments': candidate_segments,
         'candidate_transcript': candidate_transcript,
-        'sentiment': sentiment,
-        'segment_sentiments': segment_sentiments,
-        'skills_info': skills_info,
-        'evaluation': evaluation,
-        'candidate_speaker': candidate_speaker
+        'sentiment': artifacts["sentiment"],
+        'segment_sentiments': artifacts["segment_sentiments"],
+        'skills_info': artifacts["skills"],
+        'evaluation': artifacts["evaluation"],
+        'candidate_speaker': artifacts["candidate_speaker"]
     }
+
+def build_metrics(timings, mode):
+    """Per-stage timings plus model load and phrase cache stats for results['metrics']
+
+    Cache hit counts accumulate over every run in this process, like the model load stats.
+    """
+    stages = {name: timing for name, timing in timings.items() if isinstance(timing, dict)}
+    return {
+        "mode": mode,
+        "total_wall_seconds": timings.get("total_seconds", 0.0),
+        "peak_rss_mb": max([current_rss_mb()] + [stage.get("peak_rss_mb", 0.0) for stage in stages.values()]),
+        "stages": stages,
+        "model_loads": get_model_stats(),
+        "phrase_cache": phrase_cache_stats(),
+    }
+
+def _scheduler_mode(mode):
+    """run_stages mode for a pipeline mode - stages outside the streamed front run concurrently"""
+    return "concurrent" if mode == "streaming" else mode
+
+def _shift_timings(timings, offset):
+    return {name: {**timing, "start": timing["start"] + offset, "end": timing["end"] + offset}
+            for name, timing in timings.items() if isinstance(timing, dict)}
+
+def run_streaming_front(audio_path, precomputed, on_segment=None, profile_dir=PROFILE_DIR):
+    """Decode and VAD the audio (unless precomputed), then run stream_segment_stages
+
+    Returns (artifacts, timings) covering the shared audio stages and the streamed stages.
+    """
+    shared = [stage for stage in build_pipeline_stages() if stage.name in SHARED_AUDIO_STAGES and stage.name not in precomputed]
+    artifacts, timings = run_stages(shared, initial={"audio_path": audio_path, **precomputed}, profile_dir=profile_dir)
+    started = timings.pop("total_seconds")
+    streamed, metrics = measure_call("streaming", stream_segment_stages,
+                                     {"speech": artifacts["speech"], "on_segment": on_segment}, profile_dir)
+    timings["streaming"] = {"start": started, "end": started + metrics["wall_seconds"], "seconds": metrics["wall_seconds"], **metrics}
+    artifacts.update(streamed)
+    artifacts.pop("audio_path")
+    return artifacts, timings
+
+def run_full_pipeline(audio_path, candidate_speaker=None, mode=PIPELINE_MODE, metrics_log_path=METRICS_LOG_PATH,
+                      profile_dir=PROFILE_DIR, use_cache=ARTIFACT_CACHE_ENABLED, precomputed=None, audio_hash=None,
+                      on_segment=None):
+    """Run the complete interview analysis pipeline
+
+    precomputed maps stage names to outputs already produced for this audio (e.g. the
+    decoded audio from a preview run); those stages are skipped.
+    In streaming mode transcription, diarization, cleaning and segment sentiment run segment
+    by segment, and on_segment is called with each partial transcript segment.
+    """
+    
+    print(f"Starting Interview Analysis Pipeline ({mode})...")
+    precomputed = precomputed or {}
     
+    # Stages already computed for this audio content are reused from the artifact cache
+    cache = get_artifact_cache() if use_cache else None
+    if use_cache and audio_hash is None:
+        audio_hash = hash_file(audio_path)
+    
+    front_timings = {}
+    if mode == "streaming":
+        # The streamed stages are not cached; everything after them still is
+        precomputed, front_timings = run_streaming_front(audio_path, precomputed, on_segment, profile_dir)
+    
+    artifacts, timings = run_stages(
+        [stage for stage in build_pipeline_stages() if stage.name not in precomputed],
+        initial={"audio_path": audio_path, "candidate_speaker_override": candidate_speaker, **precomputed},
+        mode=_scheduler_mode(mode),
+        profile_dir=profile_dir,
+        cache=cache,
+        input_hashes={"audio_path": audio_hash},
+        cache_source=audio_hash,
+    )
+    if front_timings:
+        front_seconds = max(timing["end"] for timing in front_timings.values())
+        timings = {**front_timings, **_shift_timings(timings, front_seconds), "total_seconds": front_seconds + timings["total_seconds"]}
+    results = compile_results(artifacts)
+    results['metrics'] = build_metrics(timings, mode)
+    if metrics_log_path:
+        write_metrics_log(results['metrics'], metrics_log_path, {"audio_path": audio_path})
+    
+    print(format_timings(timings))
+    if results['metrics']['phrase_cache']:
+        cache_stats = results['metrics']['phrase_cache']
+        print(f"Phrase embedding cache: {cache_stats['hit_rate']:.0%} hit rate "
+              f"({cache_stats['memory_hits']} memory, {cache_stats['disk_hits']} disk, {cache_stats['misses']} misses)")
     print("Pipeline completed successfully!")
     return results
 
+def run_shared_audio_stages(audio_path, use_cache=ARTIFACT_CACHE_ENABLED, audio_hash=None):
+    """Decode and VAD the audio once; the result is precomputed input for both passes"""
+    cache = get_artifact_cache() if use_cache else None
+    if use_cache and audio_hash is None:
+        audio_hash = hash_file(audio_path)
+    stages = [stage for stage in build_pipeline_stages() if stage.name in SHARED_AUDIO_STAGES]
+    artifacts, _ = run_stages(stages, initial={"audio_path": audio_path}, cache=cache,
+                              input_hashes={"audio_path": audio_hash}, cache_source=audio_hash)
+    return {name: artifacts[name] for name in SHARED_AUDIO_STAGES}
+
+def run_preview(audio_path, mode=PIPELINE_MODE, use_cache=ARTIFACT_CACHE_ENABLED, audio_hash=None, precomputed=None):
+    """Draft results quickly: tiny-model transcript of the leading speech and exact skill matches
+
+    Returns (preview results, shared artifacts); pass the artifacts to run_full_pipeline as
+    precomputed so the full pass does not decode the audio again. Shared artifacts that are
+    already in precomputed are not recomputed.
+    """
+    print(f"Starting preview analysis ({mode})...")
+    precomputed = precomputed or {}
+    cache = get_artifact_cache() if use_cache else None
+    if use_cache and audio_hash is None:
+        audio_hash = hash_file(audio_path)
+
+    artifacts, timings = run_stages(
+        [stage for stage in build_preview_stages() if stage.name not in precomputed],
+        initial={"audio_path": audio_path, **precomputed},
+        mode=_scheduler_mode(mode),
+        cache=cache,
+        input_hashes={"audio_path": audio_hash},
+        cache_source=audio_hash,
+    )
+    audio_array, sample_rate = artifacts["audio"]
+    _, full_transcript = artifacts["preview_transcription"]
+    preview = {
+        'preview': True,
+        'audio_metadata': {
+            'duration': len(audio_array)/sample_rate,
+            'sample_rate': sample_rate,
+            'speech_seconds': artifacts["speech"]['speech_seconds'],
+            'skipped_fraction': artifacts["speech"]['skipped_fraction'],
+        },
+        'preview_seconds': min(artifacts["speech"]['speech_seconds'], PREVIEW_MAX_SECONDS),
+        'full_transcript': full_transcript,
+        'diarized_segments': artifacts["preview_cleaning"],
+        'skills_info': artifacts["preview_skills"],
+        'metrics': build_metrics(timings, mode),
+    }
+    print(format_timings(timings))
+    return preview, {name: artifacts[name] for name in SHARED_AUDIO_STAGES}
+
+def run_two_pass(audio_path, candidate_speaker=None, mode=PIPELINE_MODE, use_cache=ARTIFACT_CACHE_ENABLED, on_segment=None):
+    """Full pipeline in the background and a quick preview alongside it, on the same decoded audio
+
+    The full pass starts as soon as the audio is decoded and VAD has run, so it does not wait
+    for the preview. Returns (preview results, Future of the full results). The Future is
+    neither running nor done while it waits for a free background worker. on_segment is
+    passed to the full pass, which calls it from the background thread in streaming mode.
+    """
+    audio_hash = hash_file(audio_path) if use_cache else None
+    shared = run_shared_audio_stages(audio_path, use_cache, audio_hash)
+    future = _background.submit(
+        run_full_pipeline, audio_path, candidate_speaker, mode,
+        use_cache=use_cache, precomputed=shared, audio_hash=audio_hash, on_segment=on_segment,
+    )
+    preview, _ = run_preview(audio_path, mode, use_cache, audio_hash, precomputed=shared)
+    return preview, future
+
+def recompute_for_speaker(results, candidate_speaker, mode=PIPELINE_MODE):
+    """Re-derive candidate-dependent results for a different candidate speaker
+
+    Diarized segments and segment sentiments are reused as-is; only the candidate
+    transcript, overall sentiment, skills and evaluation are recomputed.
+    """
+    print(f"Recomputing analysis for candidate speaker {candidate_speaker}...")
+    speaker_stages = {"candidate", "sentiment", "skills", "evaluation"}
+    stages = [stage for stage in build_pipeline_stages() if stage.name in speaker_stages]
+
+    artifacts, timings = run_stages(
+        stages,
+        initial={
+            "cleaning": results['diarized_segments'],
+            "segment_sentiments": results['segment_sentiments'],
+            "candidate_speaker": candidate_speaker,
+        },
+        mode=_scheduler_mode(mode),
+    )
+    candidate_segments, candidate_transcript = artifacts["candidate"]
+
+    updated = dict(results)
+    updated.update({
+        'candidate_segments': candidate_segments,
+        'candidate_transcript': candidate_transcript,
+        'sentiment': artifacts["sentiment"],
+        'skills_info': artifacts["skills"],
+        'evaluation': artifacts["evaluation"],
+        'candidate_speaker': candidate_speaker,
+    })
+    updated['metrics'] = {**results.get('metrics', {}), 'speaker_swap': build_metrics(timings, mode)}
+    
+    print(format_timings(timings))
+    return updated
+
 def export_results(results, base_path):
     """Export results in multiple formats"""
     from report_exporter import export_results as export_all
@@ -85,4 +498,4 @@ def export_results(results, base_path):
         print(f"Reports exported successfully: {base_path}.[txt|json|pdf]")
     else:
         print("Some reports failed to export")
-    return success
\ No newline at end of file
+    return success
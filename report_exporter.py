@@ -14,6 +14,8 @@ def export_txt(results, file_path):
             f.write("-" * 20 + "\n")
             audio_meta = results.get('audio_metadata', {})
             f.write(f"Duration: {audio_meta.get('duration', 0):.2f} seconds\n")
+            if 'skipped_fraction' in audio_meta:
+                f.write(f"Speech: {audio_meta['speech_seconds']:.2f} seconds ({audio_meta['skipped_fraction']:.1%} silence skipped)\n")
      
             f.write("\nAI EVALUATION:\n")
             f.write("-" * 20 + "\n")
@@ -1,36 +1,17 @@
-from transformers import AutoTokenizer, AutoModelForSequenceClassification
 import torch
-from config import SENTIMENT_MODEL
+from model_registry import get_model
+from config import SENTIMENT_BATCH_SIZE, SENTIMENT_NUM_THREADS, SENTIMENT_WINDOW_OVERLAP
 
-# Load model once
-sent_model = AutoModelForSequenceClassification.from_pretrained(SENTIMENT_MODEL)
-tokenizer = AutoTokenizer.from_pretrained(SENTIMENT_MODEL)
+SENTIMENT_LABELS = ["negative", "neutral", "positive"]
+MAX_TOKENS = 512
 
-def analyze_sentiment(text):
-    """Your existing sentiment analysis function"""
-    text = text.replace("\n", " ")
-    
-    inputs = tokenizer(
-        text,
-        return_tensors="pt",
-        truncation=True,
-        max_length=512,
-        padding="max_length",
-    )
-    
-    inputs.pop("token_type_ids", None)
-    
-    with torch.no_grad():
-        outputs = sent_model(**inputs)
-    
-    scores = torch.softmax(outputs.logits, dim=1)[0].tolist()
-    labels = ["negative", "neutral", "positive"]
-    
+def _format_sentiment(scores, num_tokens=None):
+    """Build the sentiment dict from class probabilities"""
     max_score = max(scores)
     max_index = scores.index(max_score)
     
-    return {
-        "label": labels[max_index],
+    sentiment = {
+        "label": SENTIMENT_LABELS[max_index],
         "score": max_score,
         "scores": {
             "negative": scores[0],
@@ -38,14 +19,109 @@ def analyze_sentiment(text):
             "positive": scores[2]
         }
     }
+    if num_tokens is not None:
+        sentiment["num_tokens"] = num_tokens
+    return sentiment
+
+def _token_windows(token_ids, window_size, overlap):
+    """Split content tokens into overlapping windows so nothing past the model limit is dropped"""
+    if len(token_ids) <= window_size:
+        return [token_ids]
+    step = max(window_size - overlap, 1)
+    windows = []
+    for start in range(0, len(token_ids), step):
+        windows.append(token_ids[start:start + window_size])
+        if start + window_size >= len(token_ids):
+            break
+    return windows
+
+def analyze_sentiments_batch(texts, batch_size=SENTIMENT_BATCH_SIZE, num_threads=SENTIMENT_NUM_THREADS):
+    """Score many texts at once, returning one sentiment dict per text in input order
+
+    Texts are sorted by token length and each batch is padded only to its longest member.
+    Texts longer than the model limit are scored in overlapping windows whose logits are
+    averaged, weighted by window length.
+    """
+    if not texts:
+        return []
+
+    sent_model, tokenizer = get_model("sentiment")
+    if num_threads:
+        torch.set_num_threads(num_threads)
+
+    texts = [text.replace("\n", " ") for text in texts]
+    content_ids = tokenizer(texts, add_special_tokens=False, verbose=False)["input_ids"]
+    prefix = [tokenizer.cls_token_id] if tokenizer.cls_token_id is not None else []
+    suffix = [tokenizer.sep_token_id] if tokenizer.sep_token_id is not None else []
+    window_size = MAX_TOKENS - len(prefix) - len(suffix)
+
+    # Flatten every text into model-sized windows, remembering which text each came from
+    windows = []
+    for owner, token_ids in enumerate(content_ids):
+        for window in _token_windows(token_ids, window_size, SENTIMENT_WINDOW_OVERLAP):
+            windows.append((owner, max(len(window), 1), prefix + window + suffix))
+    order = sorted(range(len(windows)), key=lambda i: len(windows[i][2]))
 
-def analyze_segment_sentiments(segments):
+    summed_logits = torch.zeros(len(texts), len(SENTIMENT_LABELS))
+    total_weight = torch.zeros(len(texts), 1)
+    for start in range(0, len(order), batch_size):
+        batch = [windows[i] for i in order[start:start + batch_size]]
+        inputs = tokenizer.pad(
+            {"input_ids": [input_ids for _, _, input_ids in batch]},
+            padding="longest",
+            return_tensors="pt",
+        )
+
+        with torch.no_grad():
+            logits = sent_model(input_ids=inputs["input_ids"], attention_mask=inputs["attention_mask"]).logits
+
+        for (owner, weight, _), row in zip(batch, logits):
+            summed_logits[owner] += weight * row
+            total_weight[owner] += weight
+
+    scores = torch.softmax(summed_logits / total_weight, dim=1).tolist()
+    return [_format_sentiment(row, len(token_ids)) for row, token_ids in zip(scores, content_ids)]
+
+def analyze_sentiment(text):
+    """Your existing sentiment analysis function"""
+    return analyze_sentiments_batch([text])[0]
+
+def analyze_segment_sentiments(segments, batch_size=SENTIMENT_BATCH_SIZE, num_threads=SENTIMENT_NUM_THREADS):
     """Analyze sentiment for each segment"""
+    sentiments = analyze_sentiments_batch([segment['text'] for segment in segments], batch_size, num_threads)
     segment_sentiments = []
-    for segment in segments:
-        sentiment = analyze_sentiment(segment['text'])
+    for segment, sentiment in zip(segments, sentiments):
         segment_sentiments.append({
             **segment,
             "sentiment": sentiment
         })
-    return segment_sentiments
\ No newline at end of file
+    return segment_sentiments
+
+def aggregate_sentiment(segment_sentiments, weight_by="tokens"):
+    """Overall sentiment from already-scored segments, without re-encoding any text
+
+    Log-probabilities differ from the original logits only by a per-segment constant, so
+    their weighted mean followed by softmax is the weighted mean of the segment logits.
+    weight_by is "tokens" (token count) or "duration" (segment length in seconds).
+    """
+    if not segment_sentiments:
+        sentiment = _format_sentiment([1 / len(SENTIMENT_LABELS)] * len(SENTIMENT_LABELS), 0)
+        sentiment["label"] = "neutral"
+        return sentiment
+
+    log_probs = torch.tensor([
+        [seg["sentiment"]["scores"][label] for label in SENTIMENT_LABELS] for seg in segment_sentiments
+    ]).clamp_min(1e-12).log()
+
+    if weight_by == "duration":
+        weights = [max(seg.get("end", 0) - seg.get("start", 0), 0) for seg in segment_sentiments]
+    else:
+        weights = [seg["sentiment"].get("num_tokens", 1) for seg in segment_sentiments]
+    weights = torch.tensor(weights, dtype=torch.float32)
+    if weights.sum() <= 0:
+        weights = torch.ones(len(segment_sentiments))
+
+    pooled = (weights[:, None] * log_probs).sum(dim=0) / weights.sum()
+    scores = torch.softmax(pooled, dim=0).tolist()
+    num_tokens = sum(seg["sentiment"].get("num_tokens", 0) for seg in segment_sentiments)
+    return _format_sentiment(scores, num_tokens)
@@ -0,0 +1,163 @@
+import csv
+import hashlib
+import json
+import os
+import tempfile
+import numpy as np
+from phrase_matcher import PhraseMatcher
+from config import (
+    EMBEDDING_MODEL, SKILL_ONTOLOGY_PATH, SKILL_INDEX_DIR, SKILL_QUERY_BATCH_SIZE, SKILL_INDEX_CHUNK_SIZE,
+    TECH_SKILLS, LANGUAGE_SKILLS, TOOLS, DEGREES,
+)
+
+def _builtin_ontology():
+    """Ontology built from the skill lists in config.py"""
+    categories = [("tech", TECH_SKILLS), ("language", LANGUAGE_SKILLS), ("tool", TOOLS), ("degree", DEGREES)]
+    return [{"name": name, "category": category, "synonyms": []} for category, names in categories for name in names]
+
+def _split_synonyms(value):
+    if isinstance(value, list):
+        return [str(s).strip() for s in value if str(s).strip()]
+    return [s.strip() for s in (value or "").split("|") if s.strip()]
+
+def load_ontology(path=SKILL_ONTOLOGY_PATH):
+    """Load a skill taxonomy as a list of {"name", "category", "synonyms"} entries
+
+    Supported files: JSON (list of objects), JSONL (one object per line) and CSV with
+    name, category and synonyms columns (synonyms separated by "|").
+    """
+    if not path:
+        return _builtin_ontology()
+
+    if path.lower().endswith(".csv"):
+        with open(path, encoding="utf-8", newline="") as f:
+            rows = list(csv.DictReader(f))
+    elif path.lower().endswith(".jsonl"):
+        with open(path, encoding="utf-8") as f:
+            rows = [json.loads(line) for line in f if line.strip()]
+    else:
+        with open(path, encoding="utf-8") as f:
+            rows = json.load(f)
+
+    entries = {}
+    for row in rows:
+        name = (row.get("name") or row.get("skill") or "").strip()
+        if not name:
+            continue
+        entry = entries.setdefault(name.lower(), {"name": name, "category": (row.get("category") or "tech").strip(), "synonyms": []})
+        for synonym in _split_synonyms(row.get("synonyms")):
+            if synonym.lower() != name.lower() and synonym not in entry["synonyms"]:
+                entry["synonyms"].append(synonym)
+
+    print(f"Loaded skill ontology: {len(entries)} skills from {path}")
+    return list(entries.values())
+
+def ontology_hash(ontology):
+    """Stable content hash of an ontology"""
+    payload = json.dumps(ontology, sort_keys=True, ensure_ascii=False).encode("utf-8")
+    return hashlib.sha256(payload).hexdigest()[:16]
+
+def surface_forms(ontology):
+    """Every name and synonym with the index of the skill it belongs to"""
+    forms = []
+    for entry_id, entry in enumerate(ontology):
+        for form in [entry["name"], *entry.get("synonyms", [])]:
+            forms.append((form, entry_id))
+    return forms
+
+def build_ontology_matcher(ontology):
+    """Exact matcher over every skill name and synonym; payloads are ontology entry ids"""
+    return PhraseMatcher(surface_forms(ontology))
+
+class SkillIndex:
+    """Exact top-k cosine search over skill surface-form embeddings
+
+    Embeddings are L2-normalized and memory-mapped from disk; queries are scored in
+    bounded blocks so peak memory does not grow with the ontology size.
+    """
+
+    def __init__(self, ontology, embeddings, entry_ids):
+        self.ontology = ontology
+        self.embeddings = embeddings
+        self.entry_ids = entry_ids
+
+    def __len__(self):
+        return len(self.entry_ids)
+
+    def query(self, phrase_embeddings, top_k=1, batch_size=SKILL_QUERY_BATCH_SIZE, chunk_size=SKILL_INDEX_CHUNK_SIZE):
+        """Return (scores, entry ids), each of shape (n_phrases, top_k), best match first"""
+        phrase_embeddings = np.asarray(phrase_embeddings, dtype=np.float32)
+        n_phrases = len(phrase_embeddings)
+        top_k = min(top_k, len(self))
+        all_scores = np.empty((n_phrases, top_k), dtype=np.float32)
+        all_rows = np.empty((n_phrases, top_k), dtype=np.int64)
+        if top_k == 0:
+            # Empty ontology: nothing to match against
+            return all_scores, all_rows
+
+        for start in range(0, n_phrases, batch_size):
+            batch = phrase_embeddings[start:start + batch_size]
+            batch = batch / (np.linalg.norm(batch, axis=1, keepdims=True) + 1e-8)
+            best_scores = np.full((len(batch), top_k), -np.inf, dtype=np.float32)
+            best_rows = np.zeros((len(batch), top_k), dtype=np.int64)
+
+            for chunk_start in range(0, len(self), chunk_size):
+                chunk = np.asarray(self.embeddings[chunk_start:chunk_start + chunk_size])
+                scores = batch @ chunk.T
+                k = min(top_k, scores.shape[1])
+                rows = np.argpartition(-scores, k - 1, axis=1)[:, :k]
+                # Merge this block's candidates with the running best
+                merged_scores = np.concatenate([best_scores, np.take_along_axis(scores, rows, axis=1)], axis=1)
+                merged_rows = np.concatenate([best_rows, rows + chunk_start], axis=1)
+                keep = np.argsort(-merged_scores, axis=1)[:, :top_k]
+                best_scores = np.take_along_axis(merged_scores, keep, axis=1)
+                best_rows = np.take_along_axis(merged_rows, keep, axis=1)
+
+            all_scores[start:start + len(batch)] = best_scores
+            all_rows[start:start + len(batch)] = best_rows
+
+        return all_scores, self.entry_ids[all_rows]
+
+def _index_dir(model_name, ontology):
+    safe_model = model_name.replace("/", "__")
+    return os.path.join(SKILL_INDEX_DIR, f"{safe_model}_{ontology_hash(ontology)}")
+
+def build_skill_index(ontology, encoder, model_name=EMBEDDING_MODEL, batch_size=256):
+    """Embed every surface form and save the index next to its model/ontology key"""
+    forms = surface_forms(ontology)
+    print(f"Building skill index for {len(ontology)} skills ({len(forms)} surface forms)...")
+    if forms:
+        embeddings = encoder.encode([form for form, _ in forms], batch_size=batch_size,
+                                    convert_to_numpy=True, normalize_embeddings=True).astype(np.float32)
+    else:
+        embeddings = np.zeros((0, encoder.get_sentence_embedding_dimension()), dtype=np.float32)
+    entry_ids = np.array([entry_id for _, entry_id in forms], dtype=np.int64)
+
+    index_dir = _index_dir(model_name, ontology)
+    os.makedirs(index_dir, exist_ok=True)
+    # Write to unique temporary files first so neither a crash nor another process building
+    # the same index at once can leave a half-written file behind
+    for name, array in [("embeddings.npy", embeddings), ("entry_ids.npy", entry_ids)]:
+        fd, tmp_path = tempfile.mkstemp(prefix=f".{name}.", suffix=".tmp", dir=index_dir)
+        try:
+            with os.fdopen(fd, "wb") as f:
+                np.save(f, array)
+            os.replace(tmp_path, os.path.join(index_dir, name))
+        except BaseException:
+            os.unlink(tmp_path)
+            raise
+    return index_dir
+
+def load_skill_index(encoder, ontology=None, model_name=EMBEDDING_MODEL):
+    """Memory-map the saved index for this model and ontology, building it on first use"""
+    if ontology is None:
+        ontology = load_ontology()
+    index_dir = _index_dir(model_name, ontology)
+    embeddings_path = os.path.join(index_dir, "embeddings.npy")
+    entry_ids_path = os.path.join(index_dir, "entry_ids.npy")
+    if not (os.path.exists(embeddings_path) and os.path.exists(entry_ids_path)):
+        build_skill_index(ontology, encoder, model_name)
+
+    embeddings = np.load(embeddings_path, mmap_mode="r")
+    entry_ids = np.load(entry_ids_path)
+    return SkillIndex(ontology, embeddings, entry_ids)
@@ -1,21 +1,16 @@
-import spacy
-from sentence_transformers import SentenceTransformer, util
 import re
+from bisect import bisect_right
 import nltk
 from nltk import ngrams
-from config import SPACY_MODEL, EMBEDDING_MODEL, MASTER_SKILLS, TECH_SKILLS, LANGUAGE_SKILLS, TOOLS, DEGREES
+from spacy.lang.en.stop_words import STOP_WORDS
+from config import SKILL_MATCH_THRESHOLD, NER_BATCH_SIZE, NER_N_PROCESS
+from model_registry import get_model
+from embedding_cache import get_phrase_cache, normalize_phrase
 
 # Download required NLTK data
 nltk.download("punkt", quiet=True)
 nltk.download("punkt_tab", quiet=True)
 
-# Load models
-nlp = spacy.load(SPACY_MODEL)
-emb_model = SentenceTransformer(EMBEDDING_MODEL)
-
-# Precompute skill embeddings
-skill_embeddings = emb_model.encode(MASTER_SKILLS, convert_to_tensor=True)
-
 def extract_duration(text):
     """Your existing duration extraction"""
     pattern = r"(\d+)\s*(year|years|month|months)"
@@ -23,9 +18,99 @@ def extract_duration(text):
     durations = [{"value": m[0], "unit": m[1]} for m in matches]
     return durations
 
-def extract_candidate_info(text):
+# Exact-match categories that also fill their own bucket in the output
+CATEGORY_KEYS = {"language": "languages", "tool": "tools", "degree": "degrees"}
+
+def is_matchable_phrase(phrase):
+    """False for n-grams that cannot name a skill: only stopwords, numbers or punctuation"""
+    tokens = [re.sub(r"[^\w+#]", "", token) for token in phrase.split()]
+    tokens = [token for token in tokens if token]
+    if not tokens:
+        return False
+    if all(token.isdigit() for token in tokens):
+        return False
+    return not all(token in STOP_WORDS or token.isdigit() for token in tokens)
+
+def segment_char_offsets(segments):
+    """Start offset of each segment inside " ".join(segment texts)"""
+    offsets = []
+    position = 0
+    for seg in segments:
+        offsets.append(position)
+        position += len(seg.get("text", "")) + 1
+    return offsets
+
+def find_skill_mentions(text, segments=None):
+    """Exact and synonym ontology hits with character spans, traced to segments when given
+
+    text must be " ".join of the segment texts (as get_candidate_transcript builds it)
+    for the segment mapping to line up.
+    """
+    ontology = get_model("skill_ontology")
+    offsets = segment_char_offsets(segments) if segments else None
+
+    mentions = []
+    for start, end, entry_id in get_model("skill_matcher").find_all(text):
+        entry = ontology[entry_id]
+        mention = {
+            "skill": entry["name"],
+            "category": entry["category"],
+            "text": text[start:end],
+            "start_char": start,
+            "end_char": end,
+        }
+        if offsets:
+            index = bisect_right(offsets, start) - 1
+            mention["segment_index"] = index
+            mention["start"] = segments[index].get("start")
+            mention["end"] = segments[index].get("end")
+        mentions.append(mention)
+    return mentions
+
+def extract_entities(segments, batch_size=NER_BATCH_SIZE, n_process=NER_N_PROCESS):
+    """Named entities for each segment via nlp.pipe, tagged with their source segment"""
+    nlp = get_model("spacy")
+    texts = [seg.get("text", "") for seg in segments]
+
+    entities = []
+    docs = nlp.pipe(texts, batch_size=batch_size, n_process=n_process)
+    for index, (seg, doc) in enumerate(zip(segments, docs)):
+        for ent in doc.ents:
+            entities.append({
+                "text": ent.text,
+                "label": ent.label_,
+                "segment_index": index,
+                "start_char": ent.start_char,
+                "end_char": ent.end_char,
+                "start": seg.get("start"),
+                "end": seg.get("end"),
+            })
+    return entities
+
+def extract_skills_quick(text, segments=None):
+    """Exact and synonym skill matches plus durations only - no NER or embeddings, for draft results"""
+    extracted = {
+        "skills": set(),
+        "languages": set(),
+        "tools": set(),
+        "degrees": set(),
+        "organizations": [],
+        "projects": [],
+        "experience_durations": extract_duration(text),
+        "skill_mentions": find_skill_mentions(text, segments),
+        "entity_mentions": [],
+    }
+    for mention in extracted["skill_mentions"]:
+        extracted["skills"].add(mention["skill"])
+        if mention["category"] in CATEGORY_KEYS:
+            extracted[CATEGORY_KEYS[mention["category"]]].add(mention["skill"])
+    return {key: sorted(value) if isinstance(value, set) else value for key, value in extracted.items()}
+
+def extract_candidate_info(text, segments=None):
     """Your existing skills extraction function"""
-    doc = nlp(text)
+    emb_model = get_model("sentence_embedder")
+    skill_index = get_model("skill_index")
+    sentences = nltk.sent_tokenize(text)
 
     extracted = {
         "skills": set(),
@@ -35,52 +120,51 @@ def extract_candidate_info(text):
         "organizations": set(),
         "projects": set(),
         "experience_durations": [],
+        "skill_mentions": [],
+        "entity_mentions": [],
     }
 
-    # NER Extraction
-    for ent in doc.ents:
-        if ent.label_ == "ORG":
-            extracted["organizations"].add(ent.text)
-        if ent.label_ in ["WORK_OF_ART", "PRODUCT"]:
-            extracted["projects"].add(ent.text)
-        if ent.label_ == "EDUCATION":
-            extracted["degrees"].add(ent.text)
+    # NER Extraction - per segment when available, otherwise per sentence
+    entities = extract_entities(segments if segments else [{"text": sent} for sent in sentences])
+    for ent in entities:
+        if ent["label"] == "ORG":
+            extracted["organizations"].add(ent["text"])
+        if ent["label"] in ["WORK_OF_ART", "PRODUCT"]:
+            extracted["projects"].add(ent["text"])
+        if ent["label"] == "EDUCATION":
+            extracted["degrees"].add(ent["text"])
+    extracted["entity_mentions"] = entities
 
     # Duration Extraction
     extracted["experience_durations"] = extract_duration(text)
 
     # Phrase-level embedding matching
-    sentences = nltk.sent_tokenize(text)
     all_phrases = set()
 
     for sent in sentences:
         words = sent.split()
         for n in [1, 2, 3]:
             for gram in ngrams(words, n):
-                phrase = " ".join(gram)
-                all_phrases.add(phrase)
+                phrase = normalize_phrase(" ".join(gram))
+                if phrase and is_matchable_phrase(phrase):
+                    all_phrases.add(phrase)
 
     phrase_list = list(all_phrases)
-    if phrase_list:
-        phrase_embeddings = emb_model.encode(phrase_list, convert_to_tensor=True)
-        sim = util.cos_sim(phrase_embeddings, skill_embeddings)
-
-        for i, phrase in enumerate(phrase_list):
-            score = float(sim[i].max())
-            idx = int(sim[i].argmax())
-
-            if score > 0.60:
-                extracted["skills"].add(MASTER_SKILLS[idx])
-
-    # Language extraction
-    for lang in LANGUAGE_SKILLS:
-        if lang.lower() in text.lower():
-            extracted["languages"].add(lang)
-
-    # Degree extraction
-    for deg in DEGREES:
-        if deg.lower() in text.lower():
-            extracted["degrees"].add(deg)
+    if phrase_list and len(skill_index):
+        phrase_embeddings = get_phrase_cache().encode(phrase_list, emb_model)
+        scores, entry_ids = skill_index.query(phrase_embeddings, top_k=1)
+
+        for score, entry_id in zip(scores[:, 0], entry_ids[:, 0]):
+            if score > SKILL_MATCH_THRESHOLD:
+                extracted["skills"].add(skill_index.ontology[entry_id]["name"])
+
+    # Exact and synonym matches (skills, languages, tools, degrees) in one pass
+    mentions = find_skill_mentions(text, segments)
+    for mention in mentions:
+        extracted["skills"].add(mention["skill"])
+        if mention["category"] in CATEGORY_KEYS:
+            extracted[CATEGORY_KEYS[mention["category"]]].add(mention["skill"])
+    extracted["skill_mentions"] = mentions
 
     # Convert sets to lists for JSON serialization
     for key in extracted:
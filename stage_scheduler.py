@@ -0,0 +1,202 @@
+import time
+from concurrent.futures import ThreadPoolExecutor, ProcessPoolExecutor, wait, FIRST_COMPLETED
+from instrumentation import measure_call
+from artifact_cache import hash_value, make_stage_key
+from config import STAGE_RESOURCE_LIMITS
+
+class Stage:
+    """One pipeline step: func is called with the outputs of its dependencies as keyword arguments"""
+
+    def __init__(self, name, func, deps=(), resource="cpu", executor="thread", config=None, cacheable=True, cache_check=None):
+        if executor not in ("thread", "process"):
+            raise ValueError(f"Unknown executor for stage {name}: {executor}")
+        self.name = name
+        self.func = func
+        self.deps = tuple(deps)
+        self.resource = resource
+        self.executor = executor
+        # Settings that change this stage's output; part of its cache key
+        self.config = config or {}
+        self.cacheable = cacheable
+        # Optional predicate on the output - False keeps a failed result out of the cache
+        self.cache_check = cache_check
+
+    def __repr__(self):
+        return f"Stage({self.name!r}, deps={self.deps}, resource={self.resource!r}, executor={self.executor!r})"
+
+def _validate(stages, initial):
+    names = set(initial)
+    for stage in stages:
+        if stage.name in names:
+            raise ValueError(f"Duplicate stage or input name: {stage.name}")
+        names.add(stage.name)
+    for stage in stages:
+        missing = [dep for dep in stage.deps if dep not in names]
+        if missing:
+            raise ValueError(f"Stage {stage.name} depends on unknown stages: {missing}")
+
+def topological_order(stages, initial=()):
+    """Stages sorted so every stage comes after its dependencies"""
+    done = set(initial)
+    ordered = []
+    remaining = list(stages)
+    while remaining:
+        ready = [stage for stage in remaining if all(dep in done for dep in stage.deps)]
+        if not ready:
+            raise ValueError(f"Dependency cycle between stages: {[stage.name for stage in remaining]}")
+        for stage in ready:
+            ordered.append(stage)
+            done.add(stage.name)
+            remaining.remove(stage)
+    return ordered
+
+class _StageCache:
+    """Looks stages up in an ArtifactCache, tracking the content hash of every artifact"""
+
+    def __init__(self, cache, initial, input_hashes, source):
+        self.cache = cache
+        self.source = source
+        self.hashes = {}
+        if cache is not None:
+            for name, value in initial.items():
+                self.hashes[name] = (input_hashes or {}).get(name) or hash_value(value)
+        self.keys = {}
+
+    def lookup(self, stage):
+        """(True, output) if a stage whose dependencies are done is cached, else (False, None)"""
+        # Each stage is looked up once; a stage waiting on a resource slot keeps its miss
+        if self.cache is None or stage.name in self.keys:
+            return False, None
+        key = make_stage_key(stage.name, stage.config, [self.hashes[dep] for dep in stage.deps])
+        self.keys[stage.name] = key
+        if not stage.cacheable:
+            return False, None
+        hit = self.cache.get(key)
+        if hit is None:
+            return False, None
+        value, artifact_hash = hit
+        self.hashes[stage.name] = artifact_hash
+        return True, value
+
+    def store(self, stage, value):
+        if self.cache is None:
+            return
+        if stage.cacheable and (stage.cache_check is None or stage.cache_check(value)):
+            self.hashes[stage.name] = self.cache.put(self.keys[stage.name], stage.name, value, self.source)
+        else:
+            self.hashes[stage.name] = hash_value(value)
+
+def _cached_timing(started):
+    return {"start": started, "end": started, "seconds": 0.0, "cached": True}
+
+def run_stages(stages, initial=None, mode="concurrent", resource_limits=None, max_workers=8, profile_dir=None,
+               cache=None, input_hashes=None, cache_source=None):
+    """Execute a stage graph and return (artifacts, timings)
+
+    artifacts maps every input and stage name to its value; timings maps stage names to
+    {"start", "end", "seconds"} relative to the start of the run plus the measure_call
+    metrics (process-wide CPU time, peak RSS), and "total_seconds" to the whole run.
+    In concurrent mode independent stages overlap, limited per resource by resource_limits.
+
+    With an ArtifactCache, a stage whose key (its config plus the content hashes of its
+    inputs) is already cached is loaded instead of run. input_hashes overrides the hash
+    of initial inputs, e.g. the audio content hash for an audio path.
+    """
+    artifacts = dict(initial or {})
+    _validate(stages, artifacts)
+    stage_cache = _StageCache(cache, artifacts, input_hashes, cache_source)
+    timings = {}
+    run_start = time.perf_counter()
+
+    if mode == "sequential":
+        for stage in topological_order(stages, artifacts):
+            started = time.perf_counter() - run_start
+            found, cached = stage_cache.lookup(stage)
+            if found:
+                artifacts[stage.name] = cached
+                timings[stage.name] = _cached_timing(started)
+                print(f"Stage '{stage.name}' loaded from cache")
+                continue
+            kwargs = {dep: artifacts[dep] for dep in stage.deps}
+            artifacts[stage.name], metrics = measure_call(stage.name, stage.func, kwargs, profile_dir)
+            stage_cache.store(stage, artifacts[stage.name])
+            timings[stage.name] = {"start": started, "end": started + metrics["wall_seconds"], "seconds": metrics["wall_seconds"], **metrics}
+        timings["total_seconds"] = time.perf_counter() - run_start
+        return artifacts, timings
+
+    if mode != "concurrent":
+        raise ValueError(f"Unknown scheduler mode: {mode}")
+
+    limits = dict(STAGE_RESOURCE_LIMITS if resource_limits is None else resource_limits)
+    # A stage whose resource allows no running stages would never start
+    invalid = {resource: limit for resource, limit in limits.items() if limit < 1}
+    if invalid:
+        raise ValueError(f"Resource limits must be at least 1: {invalid}")
+    in_use = {}
+    pending = list(topological_order(stages, artifacts))
+    running = {}
+
+    thread_pool = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="stage")
+    process_pool = None
+    try:
+        while pending or running:
+            for stage in list(pending):
+                if not all(dep in artifacts for dep in stage.deps):
+                    continue
+                found, cached = stage_cache.lookup(stage)
+                if found:
+                    artifacts[stage.name] = cached
+                    timings[stage.name] = _cached_timing(time.perf_counter() - run_start)
+                    print(f"Stage '{stage.name}' loaded from cache")
+                    pending.remove(stage)
+                    continue
+                if in_use.get(stage.resource, 0) >= limits.get(stage.resource, max_workers):
+                    continue
+                kwargs = {dep: artifacts[dep] for dep in stage.deps}
+                if stage.executor == "process":
+                    if process_pool is None:
+                        process_pool = ProcessPoolExecutor()
+                    future = process_pool.submit(measure_call, stage.name, stage.func, kwargs, profile_dir)
+                else:
+                    future = thread_pool.submit(measure_call, stage.name, stage.func, kwargs, profile_dir)
+                running[future] = (stage, time.perf_counter() - run_start)
+                in_use[stage.resource] = in_use.get(stage.resource, 0) + 1
+                pending.remove(stage)
+
+            if not running:
+                if pending and any(all(dep in artifacts for dep in stage.deps) for stage in pending):
+                    # Cache hits unblocked more stages - schedule them before waiting
+                    continue
+                if not pending:
+                    break
+                raise RuntimeError(f"Stages cannot be scheduled: {[stage.name for stage in pending]}")
+
+            finished, _ = wait(running, return_when=FIRST_COMPLETED)
+            for future in finished:
+                stage, started = running.pop(future)
+                in_use[stage.resource] -= 1
+                # Re-raises the stage's exception; remaining futures are cancelled below
+                artifacts[stage.name], metrics = future.result()
+                stage_cache.store(stage, artifacts[stage.name])
+                timings[stage.name] = {"start": started, "end": time.perf_counter() - run_start, "seconds": metrics["wall_seconds"], **metrics}
+    finally:
+        for future in running:
+            future.cancel()
+        thread_pool.shutdown(wait=True, cancel_futures=True)
+        if process_pool is not None:
+            process_pool.shutdown(wait=True, cancel_futures=True)
+
+    timings["total_seconds"] = time.perf_counter() - run_start
+    return artifacts, timings
+
+def format_timings(timings):
+    """Human-readable per-stage timing table"""
+    lines = []
+    for name, timing in sorted(((k, v) for k, v in timings.items() if isinstance(v, dict)), key=lambda item: item[1]["start"]):
+        line = f"{name:22} {timing['start']:8.2f}s -> {timing['end']:8.2f}s  ({timing['seconds']:.2f}s"
+        if "process_cpu_seconds" in timing:
+            cpu = timing['process_cpu_seconds'] + timing['child_cpu_seconds']
+            line += f", process cpu {cpu:.2f}s, peak {timing['peak_rss_mb']:.0f} MB"
+        lines.append(line + ")")
+    lines.append(f"{'total':22} {timings.get('total_seconds', 0):8.2f}s")
+    return "\n".join(lines)
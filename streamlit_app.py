@@ -1,8 +1,9 @@
 import streamlit as st
 import tempfile
 import os
+import time
 from datetime import datetime
-from pipeline import run_full_pipeline
+from pipeline import run_two_pass, recompute_for_speaker
 from report_exporter import export_txt, export_json, export_pdf
 import json
 import base64
@@ -55,6 +56,12 @@ def main():
         st.session_state.analysis_complete = False
     if 'uploaded_file' not in st.session_state:
         st.session_state.uploaded_file = None
+    if 'preview_results' not in st.session_state:
+        st.session_state.preview_results = None
+    if 'full_analysis' not in st.session_state:
+        st.session_state.full_analysis = None
+    if 'partial_segments' not in st.session_state:
+        st.session_state.partial_segments = []
 
     # File upload section
     st.markdown("""
@@ -78,7 +85,7 @@ def main():
     
     st.markdown(" ")
 
-    if st.session_state.uploaded_file is not None and not st.session_state.analysis_complete:
+    if st.session_state.uploaded_file is not None and not st.session_state.analysis_complete and st.session_state.full_analysis is None:
         if st.button("Start AI Analysis", type="primary", use_container_width=True):
 
             with tempfile.NamedTemporaryFile(delete=False, suffix=os.path.splitext(st.session_state.uploaded_file.name)[1]) as tmp_file:
@@ -86,28 +93,81 @@ def main():
                 audio_path = tmp_file.name
             
             try:
-                with st.spinner("AI is analyzing your interview... This may take 5-7 minutes."):
-                    progress_bar = st.progress(0)
-                    
-                    progress_bar.progress(50) 
-                    results = run_full_pipeline(audio_path)
-                    st.session_state.analysis_results = results
-                    st.session_state.analysis_complete = True
-                    progress_bar.progress(100)
-                
-                st.success("Analysis completed successfully!")
+                # With PIPELINE_MODE = "streaming" the full pass adds segments with provisional speakers
+                # to this list as they are transcribed; other modes leave it empty
+                partial_segments = []
+                with st.spinner("Preparing a quick draft transcript..."):
+                    preview, full_analysis = run_two_pass(audio_path, on_segment=partial_segments.append)
+                # The full pass keeps using the file until it finishes
+                full_analysis.add_done_callback(lambda _: os.path.exists(audio_path) and os.unlink(audio_path))
+                st.session_state.preview_results = preview
+                st.session_state.full_analysis = full_analysis
+                st.session_state.partial_segments = partial_segments
                 st.rerun()
                 
             except Exception as e:
                 st.error(f"Error analyzing interview: {str(e)}")
-            finally:
                 if os.path.exists(audio_path):
                     os.unlink(audio_path)
     
+    # Draft preview while the full analysis runs in the background
+    full_analysis = st.session_state.full_analysis
+    if full_analysis is not None:
+        if full_analysis.done():
+            st.session_state.full_analysis = None
+            st.session_state.preview_results = None
+            st.session_state.partial_segments = []
+            try:
+                st.session_state.analysis_results = full_analysis.result()
+                st.session_state.analysis_complete = True
+                st.rerun()
+            except Exception as e:
+                st.error(f"Error analyzing interview: {str(e)}")
+        else:
+            preview = st.session_state.preview_results
+            if full_analysis.running():
+                st.info("Draft preview - the full analysis (speakers, sentiment and AI evaluation) is still running and will replace this automatically.")
+            else:
+                st.warning("Draft preview - the full analysis is queued behind other interviews being analyzed and will start as soon as a worker is free.")
+            st.subheader("Skills mentioned (draft):")
+            if preview['skills_info']['skills']:
+                skills_html = ' '.join([f'<span class="skill-item">{skill}</span>' for skill in preview['skills_info']['skills']])
+                st.markdown(skills_html, unsafe_allow_html=True)
+            else:
+                st.info("No skills detected yet")
+            partial_segments = list(st.session_state.partial_segments)
+            if partial_segments:
+                st.subheader(f"Live transcript ({partial_segments[-1]['end']:.0f}s of {preview['audio_metadata']['duration']:.0f}s, speakers provisional):")
+                draft_lines = [f"{seg['start']:.1f}s  {seg['speaker']}: {seg['text']}" for seg in partial_segments]
+            else:
+                st.subheader(f"Draft transcript (first {preview['preview_seconds']:.0f}s of speech):")
+                draft_lines = [f"{seg['start']:.1f}s  {seg['text']}" for seg in preview['diarized_segments']]
+            st.text_area("Draft transcript", "\n".join(draft_lines), height=400, label_visibility="collapsed")
+            time.sleep(2)
+            st.rerun()
+    
     # Display results if analysis is complete
     if st.session_state.analysis_complete and st.session_state.analysis_results:
         results = st.session_state.analysis_results
         
+        # Speaker swap - recompute candidate analysis without re-running audio stages
+        speakers = sorted({seg['speaker'] for seg in results['diarized_segments']})
+        if len(speakers) > 1:
+            with st.expander("Wrong candidate detected? Swap speaker"):
+                selected_speaker = st.selectbox(
+                    "Candidate speaker",
+                    speakers,
+                    index=speakers.index(results['candidate_speaker']) if results['candidate_speaker'] in speakers else 0,
+                    key="candidate_speaker_select"
+                )
+                if st.button("Recompute for selected speaker", disabled=selected_speaker == results['candidate_speaker']):
+                    try:
+                        with st.spinner("Updating candidate analysis..."):
+                            st.session_state.analysis_results = recompute_for_speaker(results, selected_speaker)
+                        st.rerun()
+                    except Exception as e:
+                        st.error(f"Error updating analysis: {str(e)}")
+        
         tab1, tab2, tab3, tab4 = st.tabs([
             "Dashboard", "AI Evaluation", "Skills Analysis", "Transcript"
         ])
@@ -1,25 +1,238 @@
-import whisper
+import os
+import re
+import time
+import multiprocessing
+from itertools import repeat
+from concurrent.futures import ProcessPoolExecutor
 import numpy as np
-from config import WHISPER_MODEL_SIZE
+from model_registry import get_model
+from audio_ingest import find_silence_split_points, frame_rms
+from config import (
+    TRANSCRIBE_CHUNK_SECONDS, TRANSCRIBE_SPLIT_SEARCH_SECONDS, TRANSCRIBE_WORKERS, STREAM_CHUNK_SECONDS,
+    TRANSCRIPTION_LANGUAGE, LANGUAGE_DETECT_SECONDS, DECODING_PROFILES, DECODING_PROFILE, WORD_TIMESTAMPS,
+)
 
-# Load Whisper model once
-whisper_model = whisper.load_model(WHISPER_MODEL_SIZE)
+# Whisper reports "seek" in mel frames (10 ms hop)
+WHISPER_FRAMES_PER_SECOND = 100
 
-def transcribe_audio_from_array(audio_array, sample_rate=16000):
+def get_whisper_model(name="whisper"):
+    """Shared transcription backend (see transcription_backends), loaded on first use"""
+    return get_model(name)
+
+def decoding_options(language=None, profile=DECODING_PROFILE, word_timestamps=WORD_TIMESTAMPS):
+    """Backend options for a decoding profile, with the language pinned when known"""
+    if profile not in DECODING_PROFILES:
+        raise ValueError(f"Unknown decoding profile: {profile}. Available: {sorted(DECODING_PROFILES)}")
+    options = dict(DECODING_PROFILES[profile])
+    if language:
+        options["language"] = language
+    if word_timestamps:
+        options["word_timestamps"] = True
+    return options
+
+def _first_speech_sample(audio_array, sample_rate, frame_seconds=0.03):
+    """Start of the first frame with a tenth of the peak frame energy"""
+    rms, frame_length = frame_rms(audio_array, sample_rate, frame_seconds)
+    if len(rms) == 0 or rms.max() == 0:
+        return 0
+    return int(np.argmax(rms >= 0.1 * rms.max())) * frame_length
+
+def detect_language(audio_array, sample_rate=16000, model_name="whisper", window_seconds=LANGUAGE_DETECT_SECONDS):
+    """Language of the first window of speech, detected once so the whole file is decoded with it pinned
+
+    TRANSCRIPTION_LANGUAGE wins when set; None leaves detection to the backend.
+    """
+    if TRANSCRIPTION_LANGUAGE:
+        return TRANSCRIPTION_LANGUAGE
+    model = get_whisper_model(model_name)
+    if not hasattr(model, "detect_language"):
+        return None
+    window = int(window_seconds * sample_rate)
+    # Look for speech only near the start, without scanning an hour of audio
+    start = _first_speech_sample(audio_array[:10 * window], sample_rate)
+    detected = model.detect_language(audio_array[start:start + window])
+    if detected is None:
+        return None
+    language, probability = detected
+    print(f"Detected language: {language} ({probability:.2f}), pinned for the whole file")
+    return language
+
+def decoding_stats(segments, decode_seconds, audio_seconds):
+    """Decode speed and how many segments needed temperature fallback retries"""
+    return {
+        "decode_seconds": decode_seconds,
+        "realtime_factor": audio_seconds / decode_seconds if decode_seconds > 0 else 0.0,
+        "segments": len(segments),
+        # A segment's temperature is that of the decode that was kept; above 0 means it was retried
+        "fallback_segments": sum(1 for seg in segments if seg.get("temperature", 0.0) > 0),
+    }
+
+def _report(segments, started, audio_seconds):
+    stats = decoding_stats(segments, time.perf_counter() - started, audio_seconds)
+    print(f"Transcription complete. Segments: {stats['segments']} ({stats['fallback_segments']} needed fallback), "
+          f"{stats['realtime_factor']:.1f}x real time")
+
+def transcribe_audio_from_array(audio_array, sample_rate=16000, model_name="whisper", language=None, profile=DECODING_PROFILE,
+                                word_timestamps=WORD_TIMESTAMPS):
     """Transcribe audio from numpy array - returns segments with timestamps"""
     print("Transcribing audio with Whisper from array...")
+    started = time.perf_counter()
+    if language is None:
+        language = detect_language(audio_array, sample_rate, model_name)
     
-    audio_float = audio_array.astype(np.float32)
-    result = whisper_model.transcribe(audio_float)
+    result = get_whisper_model(model_name).transcribe(audio_array, **decoding_options(language, profile, word_timestamps))
     
-    print(f"Transcription complete. Segments: {len(result['segments'])}")
+    _report(result["segments"], started, len(audio_array) / sample_rate)
     return result["segments"], result["text"]
 
-def transcribe_audio_from_file(audio_path):
+def transcribe_audio_from_file(audio_path, profile=DECODING_PROFILE):
     """Transcribe audio from file path - returns segments with timestamps"""
     print("Transcribing audio with Whisper from file...")
     
-    result = whisper_model.transcribe(audio_path)
+    result = get_whisper_model().transcribe(audio_path, **decoding_options(TRANSCRIPTION_LANGUAGE, profile))
     
     print(f"Transcription complete. Segments: {len(result['segments'])}")
-    return result["segments"], result["text"]
\ No newline at end of file
+    return result["segments"], result["text"]
+
+def _init_transcription_worker(num_threads):
+    """Pool initializer - pin torch threads and load Whisper once per worker"""
+    import torch
+    torch.set_num_threads(num_threads)
+    get_whisper_model()
+
+def _transcribe_chunk(chunk, options):
+    """Transcribe one audio chunk inside a worker process"""
+    result = get_whisper_model().transcribe(np.asarray(chunk, dtype=np.float32), **options)
+    return result["segments"]
+
+def _normalize_word(word):
+    return re.sub(r"[^\w']", "", word.lower())
+
+def _boundary_overlap(previous_text, next_text, allow_single_word, max_words=8):
+    """Number of leading words of next_text that repeat the tail of previous_text"""
+    prev_words = [_normalize_word(w) for w in previous_text.split()]
+    next_words = [_normalize_word(w) for w in next_text.split()]
+    min_words = 1 if allow_single_word else 2
+    for k in range(min(max_words, len(prev_words), len(next_words)), min_words - 1, -1):
+        if prev_words[-k:] == next_words[:k] and any(prev_words[-k:]):
+            return k
+    return 0
+
+def _shift_segment(segment, offset, chunk_end):
+    """Copy a chunk-relative Whisper segment onto the global timeline"""
+    shifted = dict(segment)
+    shifted["start"] = segment["start"] + offset
+    shifted["end"] = min(segment["end"] + offset, chunk_end)
+    if "seek" in segment:
+        shifted["seek"] = segment["seek"] + int(round(offset * WHISPER_FRAMES_PER_SECOND))
+    if segment.get("words"):
+        shifted["words"] = [
+            {**word, "start": word["start"] + offset, "end": min(word["end"] + offset, chunk_end)}
+            for word in segment["words"]
+        ]
+    return shifted
+
+def stitch_chunk(stitched, segments, offset, chunk_end):
+    """Append one chunk's segments to stitched on the global timeline; returns the segments added
+
+    Words repeated across the boundary with the previous chunk are dropped.
+    """
+    added = []
+    for index, segment in enumerate(segments):
+        shifted = _shift_segment(segment, offset, chunk_end)
+        # Whisper occasionally emits timestamps past the end of the chunk
+        if shifted["start"] >= chunk_end:
+            continue
+
+        if index == 0 and stitched:
+            previous = stitched[-1]
+            overlaps_in_time = shifted["start"] < previous["end"]
+            k = _boundary_overlap(previous["text"], shifted["text"], overlaps_in_time)
+            if k:
+                shifted["text"] = " " + " ".join(shifted["text"].split()[k:])
+                shifted.pop("tokens", None)
+                if shifted.get("words"):
+                    shifted["words"] = shifted["words"][k:]
+                    if shifted["words"]:
+                        shifted["start"] = shifted["words"][0]["start"]
+                if not shifted["text"].strip():
+                    continue
+
+        shifted["id"] = len(stitched)
+        stitched.append(shifted)
+        added.append(shifted)
+    return added
+
+def stitch_chunk_segments(chunk_segments, chunk_bounds):
+    """Merge per-chunk segments into one list with global timestamps and no repeated boundary words
+
+    chunk_bounds holds (start_seconds, end_seconds) for each chunk, in order.
+    """
+    stitched = []
+    for segments, (offset, chunk_end) in zip(chunk_segments, chunk_bounds):
+        stitch_chunk(stitched, segments, offset, chunk_end)
+
+    full_text = "".join(seg["text"] for seg in stitched)
+    return stitched, full_text
+
+# Chunk pool size when transcribe_audio_chunked is not given one; see set_transcribe_workers
+_transcribe_workers = TRANSCRIBE_WORKERS
+
+def set_transcribe_workers(num_workers):
+    """Default chunk pool size for this process, e.g. 1 inside batch workers that already run in parallel"""
+    global _transcribe_workers
+    _transcribe_workers = num_workers
+
+def transcribe_audio_chunked(audio_array, sample_rate=16000, max_chunk_seconds=TRANSCRIBE_CHUNK_SECONDS, num_workers=None,
+                             profile=DECODING_PROFILE):
+    """Transcribe long audio by splitting at silences and decoding chunks in a worker pool
+
+    The language is detected once here and pinned for every chunk.
+    """
+    if num_workers is None:
+        num_workers = _transcribe_workers
+    bounds = find_silence_split_points(audio_array, sample_rate, max_chunk_seconds, TRANSCRIBE_SPLIT_SEARCH_SECONDS)
+    if len(bounds) == 1:
+        return transcribe_audio_from_array(audio_array, sample_rate, profile=profile)
+
+    print(f"Transcribing audio with Whisper in {len(bounds)} chunks ({num_workers} workers)...")
+    started = time.perf_counter()
+    options = decoding_options(detect_language(audio_array, sample_rate), profile)
+    chunks = [audio_array[start:end] for start, end in bounds]
+    chunk_bounds = [(start / sample_rate, end / sample_rate) for start, end in bounds]
+
+    if num_workers <= 1:
+        chunk_segments = [_transcribe_chunk(chunk, options) for chunk in chunks]
+    else:
+        threads_per_worker = max(1, (os.cpu_count() or 1) // num_workers)
+        # spawn avoids inheriting torch's thread pool state through fork
+        context = multiprocessing.get_context("spawn")
+        with ProcessPoolExecutor(max_workers=min(num_workers, len(chunks)), mp_context=context,
+                                 initializer=_init_transcription_worker, initargs=(threads_per_worker,)) as pool:
+            chunk_segments = list(pool.map(_transcribe_chunk, chunks, repeat(options)))
+
+    segments, full_text = stitch_chunk_segments(chunk_segments, chunk_bounds)
+    _report(segments, started, len(audio_array) / sample_rate)
+    return segments, full_text
+
+def stream_transcription(audio_array, sample_rate=16000, chunk_seconds=STREAM_CHUNK_SECONDS, model_name="whisper", profile=DECODING_PROFILE):
+    """Yield Whisper segments as they are decoded
+
+    Backends that decode lazily (faster-whisper) stream segment by segment; otherwise the audio
+    is cut at silences into chunks of at most chunk_seconds and each chunk's segments are
+    yielded as soon as it is transcribed, stitched onto the global timeline. The language is
+    detected once and pinned for every chunk.
+    """
+    model = get_whisper_model(model_name)
+    started = time.perf_counter()
+    options = decoding_options(detect_language(audio_array, sample_rate, model_name), profile)
+    stitched = []
+    if hasattr(model, "transcribe_stream"):
+        for segment in model.transcribe_stream(audio_array, **options):
+            stitched.append(segment)
+            yield segment
+    else:
+        for start, end in find_silence_split_points(audio_array, sample_rate, chunk_seconds, min(TRANSCRIBE_SPLIT_SEARCH_SECONDS, chunk_seconds / 2)):
+            result = model.transcribe(audio_array[start:end], **options)
+            yield from stitch_chunk(stitched, result["segments"], start / sample_rate, end / sample_rate)
+    _report(stitched, started, len(audio_array) / sample_rate)
@@ -0,0 +1,121 @@
+"""Speech-to-text engines behind one interface
+
+Every backend has transcribe(audio, **options) taking 16 kHz float32 audio (or a file path) and
+openai-whisper style options, and returns {"segments", "text", "language"} with segments shaped like
+openai-whisper's (id, seek, start, end, text, tokens, temperature, avg_logprob,
+compression_ratio, no_speech_prob and, with word_timestamps, words).
+Backends that decode incrementally also have transcribe_stream(audio, **options), a generator
+of the same segments. detect_language(audio) returns (language code, probability) for the
+first 30 seconds of audio, or None when the installed backend cannot detect it on its own.
+"""
+import numpy as np
+from config import TRANSCRIPTION_BACKEND, WHISPER_MODEL_SIZE, FASTER_WHISPER_COMPUTE_TYPE, FASTER_WHISPER_CPU_THREADS
+
+# openai-whisper option names that faster-whisper spells differently
+_FASTER_WHISPER_OPTION_NAMES = {"logprob_threshold": "log_prob_threshold"}
+# openai-whisper options with no faster-whisper equivalent
+_FASTER_WHISPER_IGNORED_OPTIONS = {"fp16", "verbose", "carry_initial_prompt"}
+
+def _as_input(audio):
+    # No copy when the audio is already float32 (e.g. a memory-mapped array)
+    return audio if isinstance(audio, str) else np.asarray(audio, dtype=np.float32)
+
+class OpenAIWhisperBackend:
+    """Reference openai-whisper model in fp32 on CPU (fp16 on GPU)"""
+    name = "openai-whisper"
+
+    def __init__(self, model_size):
+        import whisper
+        self.model = whisper.load_model(model_size)
+
+    def transcribe(self, audio, **options):
+        options.setdefault("fp16", self.model.device.type != "cpu")
+        # openai-whisper decodes greedily only without a beam size
+        if options.get("beam_size") == 1:
+            del options["beam_size"]
+        result = self.model.transcribe(_as_input(audio), **options)
+        return {"segments": result["segments"], "text": result["text"], "language": result.get("language")}
+
+    def detect_language(self, audio):
+        import whisper
+        if not self.model.is_multilingual:
+            return "en", 1.0
+        mel = whisper.log_mel_spectrogram(whisper.pad_or_trim(_as_input(audio)), n_mels=self.model.dims.n_mels, device=self.model.device)
+        _, probabilities = self.model.detect_language(mel)
+        language = max(probabilities, key=probabilities.get)
+        return language, float(probabilities[language])
+
+class FasterWhisperBackend:
+    """CTranslate2 Whisper (faster-whisper) with quantized weights, int8 on CPU by default"""
+    name = "faster-whisper"
+
+    def __init__(self, model_size, compute_type=FASTER_WHISPER_COMPUTE_TYPE, cpu_threads=FASTER_WHISPER_CPU_THREADS, device="cpu"):
+        try:
+            from faster_whisper import WhisperModel
+        except ImportError as e:
+            raise ImportError("TRANSCRIPTION_BACKEND = 'faster-whisper' needs: pip install -r requirements-optional.txt") from e
+        self.model = WhisperModel(model_size, device=device, compute_type=compute_type, cpu_threads=cpu_threads)
+
+    def _decode(self, audio, options):
+        kwargs = {}
+        for key, value in options.items():
+            if key not in _FASTER_WHISPER_IGNORED_OPTIONS:
+                kwargs[_FASTER_WHISPER_OPTION_NAMES.get(key, key)] = value
+        if isinstance(kwargs.get("temperature"), tuple):
+            kwargs["temperature"] = list(kwargs["temperature"])
+        # Segments are decoded lazily as the iterator is consumed
+        return self.model.transcribe(_as_input(audio), **kwargs)
+
+    def transcribe(self, audio, **options):
+        segment_iter, info = self._decode(audio, options)
+        segments = [self._to_whisper_segment(index, segment) for index, segment in enumerate(segment_iter)]
+        return {"segments": segments, "text": "".join(seg["text"] for seg in segments), "language": info.language}
+
+    def transcribe_stream(self, audio, **options):
+        """Yield segments as they are decoded"""
+        segment_iter, _ = self._decode(audio, options)
+        for index, segment in enumerate(segment_iter):
+            yield self._to_whisper_segment(index, segment)
+
+    def detect_language(self, audio):
+        if not self.model.model.is_multilingual:
+            return "en", 1.0
+        # WhisperModel.detect_language was added in faster-whisper 1.1; older versions only
+        # detect the language inside transcribe()
+        if not hasattr(self.model, "detect_language"):
+            return None
+        language, probability, _ = self.model.detect_language(_as_input(audio))
+        return language, float(probability)
+
+    @staticmethod
+    def _to_whisper_segment(index, segment):
+        converted = {
+            "id": index,
+            "seek": segment.seek,
+            "start": segment.start,
+            "end": segment.end,
+            "text": segment.text,
+            "tokens": list(segment.tokens),
+            "temperature": segment.temperature,
+            "avg_logprob": segment.avg_logprob,
+            "compression_ratio": segment.compression_ratio,
+            "no_speech_prob": segment.no_speech_prob,
+        }
+        if segment.words is not None:
+            converted["words"] = [
+                {"word": word.word, "start": word.start, "end": word.end, "probability": word.probability}
+                for word in segment.words
+            ]
+        return converted
+
+BACKENDS = {
+    OpenAIWhisperBackend.name: OpenAIWhisperBackend,
+    FasterWhisperBackend.name: FasterWhisperBackend,
+}
+
+def load_transcription_backend(name=TRANSCRIPTION_BACKEND, model_size=WHISPER_MODEL_SIZE, **kwargs):
+    """Instantiate a backend by name with a Whisper model size (tiny, base, small, ...)"""
+    if name not in BACKENDS:
+        raise ValueError(f"Unknown transcription backend: {name}. Available: {sorted(BACKENDS)}")
+    print(f"Loading {name} '{model_size}' model...")
+    return BACKENDS[name](model_size, **kwargs)